@@ -23,18 +23,70 @@ FLOW:
 import json
 import os
 from typing import Dict, Any, Optional
-import boto3
 
 # Import our shared utilities
-from shared.logger import Logger
+from shared.logger import Logger, flush_logs
 from shared.security import validate_tenant_id, sanitize_for_logging
+from shared.database import ALL_AGENTS
+
+# orjson is a C-accelerated JSON library (several times faster than stdlib json).
+# Fall back to stdlib json if it's not installed (e.g. running locally).
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so except clauses still work.
+try:
+    import orjson
+
+    # orjson returns bytes, but response bodies must be str: the Lambda runtime
+    # JSON-encodes the whole response dict and can't serialize bytes
+    # ("Unable to marshal response"). Keep the .decode().
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    # Lambda invoke payloads can be bytes - no decode/re-encode round trip
+    _dumpb = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    _dumps = json.dumps
+    _loads = json.loads
+
+    def _dumpb(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
 
 # ============================================
 # INITIALIZE AWS CLIENTS
 # ============================================
 
 # Lambda client - for invoking other Lambdas
-lambda_client = boto3.client('lambda')
+# Created on first use, not at import time: importing boto3 and loading the
+# Lambda service model costs hundreds of ms of cold start, and requests that
+# never invoke an agent (e.g. ROVO_INSIGHTS) shouldn't pay for it.
+_lambda_client = None
+
+
+def _get_lambda():
+    """Return the shared Lambda client, creating it on first call."""
+    global _lambda_client
+    
+    if _lambda_client is None:
+        import boto3
+        from botocore.config import Config
+        
+        # Keep connections to the Lambda API alive between invocations so
+        # repeated agent calls from a warm container skip the TLS handshake.
+        # Fail fast on connect, and let adaptive retries back off when throttled.
+        # read_timeout must outlast the agents' 60s timeout (serverless.yml):
+        # a synchronous invoke that times out on the read is retried, which
+        # runs the agent a second time.
+        config = Config(
+            tcp_keepalive=True,
+            max_pool_connections=50,
+            retries={'max_attempts': 2, 'mode': 'adaptive'},
+            connect_timeout=1,
+            read_timeout=70
+        )
+        _lambda_client = boto3.client('lambda', config=config)
+    
+    return _lambda_client
+
 
 # Get current AWS region from environment
 REGION = os.environ.get('AWS_REGION', 'us-east-1')
@@ -45,6 +97,12 @@ STAGE = os.environ.get('STAGE', 'dev')
 # Example: clinisight-backend-dev-tasksmith
 SERVICE_NAME = 'clinisight-backend'
 
+# Full function name for each agent, built once at cold start
+_FUNCTION_NAMES = {
+    name: f"{SERVICE_NAME}-{STAGE}-{name}"
+    for name in ('tasksmith', 'caretrack', 'dealflow', 'mindmesh', 'roadmapsmith')
+}
+
 
 # ============================================
 # LAMBDA HANDLER (Main Entry Point)
@@ -78,12 +136,12 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     # ========================================
     if isinstance(event, str):
         try:
-            event = json.loads(event)
+            event = _loads(event)
         except json.JSONDecodeError:
             return {
                 'statusCode': 400,
                 'headers': {'Content-Type': 'application/json'},
-                'body': json.dumps({
+                'body': _dumps({
                     'error': 'Invalid JSON in event',
                     'orchestrator': 'error'
                 })
@@ -106,7 +164,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     if event_source == 'api_gateway':
         # Event from API Gateway (webhook)
         # Body is JSON string, need to parse it
-        body = json.loads(event.get('body', '{}'))
+        body = _loads(event.get('body', '{}'))
         event_type = body.get('eventType', 'UNKNOWN')
         tenant_id = body.get('tenantId', 'unknown')
         event_data = body.get('data', {})
@@ -132,7 +190,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return {
             'statusCode': 400,
             'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
+            'body': _dumps({
                 'error': 'Invalid or missing tenantId',
                 'provided': tenant_id
             })
@@ -165,7 +223,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return {
             'statusCode': 200,
             'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps(result)
+            'body': _dumps(result)
         }
         
     except Exception as e:
@@ -177,16 +235,24 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return {
             'statusCode': 500,
             'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
+            'body': _dumps({
                 'error': str(e),
                 'event_type': event_type
             })
         }
+    
+    finally:
+        # Make sure our log lines are written before AWS freezes the container
+        flush_logs()
 
 
 # ============================================
 # EVENT SOURCE DETECTION
 # ============================================
+# Indexed by the fingerprint computed in determine_event_source()
+_EVENT_SOURCES = ('direct', 'eventbridge', 'api_gateway', 'api_gateway')
+
+
 def determine_event_source(event: Dict[str, Any]) -> str:
     """
     Figure out where the event came from.
@@ -203,16 +269,13 @@ def determine_event_source(event: Dict[str, Any]) -> str:
         'api_gateway', 'eventbridge', or 'direct'
     """
     
-    # Check for API Gateway markers
-    if 'httpMethod' in event and 'headers' in event:
-        return 'api_gateway'
-    
-    # Check for EventBridge markers
-    if 'source' in event and 'detail-type' in event:
-        return 'eventbridge'
+    # Build a 2-bit fingerprint and look the answer up in a table:
+    #   bit 1 = API Gateway markers, bit 0 = EventBridge markers
+    # API Gateway wins if both are present (index 3), same as before.
+    is_api_gateway = 'httpMethod' in event and 'headers' in event
+    is_eventbridge = 'source' in event and 'detail-type' in event
     
-    # Otherwise, direct invocation
-    return 'direct'
+    return _EVENT_SOURCES[(is_api_gateway << 1) | is_eventbridge]
 
 
 # ============================================
@@ -228,6 +291,7 @@ def route_event(
     Route event to the appropriate agent.
     
     This is the "decision tree" - based on event_type, call the right agent.
+    The event type → handler mapping lives in _ROUTES.
     
     Args:
         event_type: Type of event (e.g., "EPIC_CREATED", "SCHEDULED_CHECK")
@@ -248,60 +312,75 @@ def route_event(
     })
     
     # ========================================
-    # ROUTING RULES
+    # ROUTING RULES (see _ROUTES below)
     # ========================================
     
-    if event_type == 'EPIC_CREATED' or event_type == 'JIRA_EPIC_CREATED':
-        # Epic created in Jira → TaskSmith
-        log.info("Routing to TaskSmith")
-        
-        # Extract epic details from event_data
-        epic_key = event_data.get('epicKey') or event_data.get('issue', {}).get('key')
-        epic_summary = event_data.get('epicSummary') or event_data.get('issue', {}).get('fields', {}).get('summary')
-        
-        # Build payload for TaskSmith
-        payload = {
-            'tenantId': tenant_id,
-            'epicKey': epic_key,
-            'epicSummary': epic_summary
-        }
-        
-        # Invoke TaskSmith Lambda
-        result = invoke_agent('tasksmith', payload, log)
-        return result
-    
-    elif event_type == 'SCHEDULED_CHECK' or event_type == 'CARETRACK_CHECK':
-        # Scheduled workflow check → CareTrack
-        log.info("Routing to CareTrack")
-        
-        # CareTrack doesn't need much data - just tenant
-        payload = {
-            'tenantId': tenant_id
-        }
-        
-        # Invoke CareTrack Lambda (when we build it)
-        # For now, return placeholder
-        return {
-            'agent': 'CareTrack',
-            'status': 'not_implemented',
-            'message': 'CareTrack agent coming soon!'
-        }
-    
-    elif event_type == 'ROVO_INSIGHTS':
-        # Rovo requesting insights → Get all agent states
-        log.info("Fetching Rovo insights")
-        
-        # Get insights from all agents
-        insights = get_rovo_insights(tenant_id, log)
-        return insights
+    handler = _ROUTES.get(event_type)
     
-    else:
+    if handler is None:
         # Unknown event type
         log.warning("Unknown event type", {
             "event_type": event_type
         })
         
         raise ValueError(f"Unknown event type: {event_type}")
+    
+    return handler(tenant_id, event_data, log)
+
+
+def _to_tasksmith(tenant_id: str, event_data: Dict[str, Any], log: Logger) -> Dict[str, Any]:
+    """Epic created in Jira → TaskSmith"""
+    log.info("Routing to TaskSmith")
+    
+    # Extract epic details from event_data
+    epic_key = event_data.get('epicKey') or event_data.get('issue', {}).get('key')
+    epic_summary = event_data.get('epicSummary') or event_data.get('issue', {}).get('fields', {}).get('summary')
+    
+    # Build payload for TaskSmith
+    payload = {
+        'tenantId': tenant_id,
+        'epicKey': epic_key,
+        'epicSummary': epic_summary
+    }
+    
+    # Invoke TaskSmith Lambda asynchronously
+    # The webhook doesn't need the subtask list back - TaskSmith saves
+    # its results to DynamoDB, so don't wait for it to finish
+    result = invoke_agent('tasksmith', payload, log, synchronous=False)
+    return result
+
+
+def _to_caretrack(tenant_id: str, event_data: Dict[str, Any], log: Logger) -> Dict[str, Any]:
+    """Scheduled workflow check → CareTrack"""
+    log.info("Routing to CareTrack")
+    
+    # Invoke CareTrack Lambda (when we build it)
+    # For now, return placeholder
+    return {
+        'agent': 'CareTrack',
+        'status': 'not_implemented',
+        'message': 'CareTrack agent coming soon!'
+    }
+
+
+def _to_rovo(tenant_id: str, event_data: Dict[str, Any], log: Logger) -> Dict[str, Any]:
+    """Rovo requesting insights → Get all agent states"""
+    log.info("Fetching Rovo insights")
+    
+    # Get insights from all agents
+    insights = get_rovo_insights(tenant_id, log)
+    return insights
+
+
+# Event type → handler function
+# One dict lookup instead of a chain of string comparisons
+_ROUTES = {
+    'EPIC_CREATED': _to_tasksmith,
+    'JIRA_EPIC_CREATED': _to_tasksmith,
+    'SCHEDULED_CHECK': _to_caretrack,
+    'CARETRACK_CHECK': _to_caretrack,
+    'ROVO_INSIGHTS': _to_rovo
+}
 
 
 # ============================================
@@ -310,7 +389,8 @@ def route_event(
 def invoke_agent(
     agent_name: str,
     payload: Dict[str, Any],
-    log: Logger
+    log: Logger,
+    synchronous: bool = True
 ) -> Dict[str, Any]:
     """
     Invoke another Lambda function (agent).
@@ -321,47 +401,66 @@ def invoke_agent(
         agent_name: Name of agent (e.g., 'tasksmith')
         payload: Data to pass to agent
         log: Logger instance
+        synchronous: Wait for the agent's result (default). Pass False to
+                     fire-and-forget - we don't pay for the agent's runtime
+                     while waiting on it.
     
     Returns:
-        Agent's response (parsed from JSON)
+        Agent's response (parsed from JSON), or
+        {"agent": ..., "status": "queued"} for asynchronous calls
     
     How it works:
-    1. Build full Lambda function name
-    2. Call lambda_client.invoke()
-    3. Parse response
+    1. Look up full Lambda function name
+    2. Call _get_lambda().invoke()
+    3. Parse response (synchronous calls only)
     4. Return result
     """
     
-    # Build Lambda function name
+    # Look up Lambda function name (precomputed at module load)
     # Format: clinisight-backend-{stage}-{agent}
-    function_name = f"{SERVICE_NAME}-{STAGE}-{agent_name}"
+    function_name = _FUNCTION_NAMES[agent_name]
     
     log.info("Invoking agent Lambda", {
         "agent": agent_name,
-        "function_name": function_name
+        "function_name": function_name,
+        "synchronous": synchronous
     })
     
     try:
+        if not synchronous:
+            # InvocationType='Event' = asynchronous (fire-and-forget)
+            # Lambda queues the event and returns immediately
+            _get_lambda().invoke(
+                FunctionName=function_name,
+                InvocationType='Event',
+                Payload=_dumpb(payload)
+            )
+            
+            return {
+                'agent': agent_name,
+                'status': 'queued'
+            }
+        
         # Invoke the Lambda function
         # InvocationType='RequestResponse' = synchronous (wait for result)
-        response = lambda_client.invoke(
+        response = _get_lambda().invoke(
             FunctionName=function_name,
             InvocationType='RequestResponse',  # Synchronous
-            Payload=json.dumps(payload)
+            Payload=_dumpb(payload)
         )
         
         # Read response
         response_payload = response['Payload'].read()
         
         # Parse JSON
-        result = json.loads(response_payload)
+        result = _loads(response_payload)
         
         # Lambda returns API Gateway format: {"statusCode": 200, "body": "{...}"}
         # Extract the body
         if 'body' in result:
             # Parse body if it's a string
             if isinstance(result['body'], str):
-                body = json.loads(result['body'])
+                body = _loads(result['body'])
             else:
                 body = result['body']
             
@@ -387,6 +486,31 @@ def invoke_agent(
 # ============================================
 # ROVO INSIGHTS (Get All Agent States)
 # ============================================
+# Default entry for agents with no saved state: TaskSmith is built but
+# hasn't processed an epic for this tenant yet, the others aren't built yet
+_PLACEHOLDER = {
+    agent_name: (
+        {'status': 'idle', 'summary': 'No epics processed yet'} if agent_name == 'TaskSmith'
+        else {'status': 'not_implemented', 'summary': 'Coming soon'}
+    )
+    for agent_name in ALL_AGENTS
+}
+
+
+def _summarize(agent_name: str, state: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn one agent's saved state into its Rovo dashboard entry."""
+    if agent_name == 'TaskSmith':
+        return {
+            'status': 'active',
+            'summary': f"Processed {state.get('epic_key', 'unknown epic')}, created {state.get('subtasks_created', 0)} subtasks"
+        }
+    
+    return {
+        'status': 'active',
+        'summary': 'Agent data available'
+    }
+
+
 def get_rovo_insights(tenant_id: str, log: Logger) -> Dict[str, Any]:
     """
     Get insights from all agents for Rovo dashboard.
@@ -408,33 +532,16 @@ def get_rovo_insights(tenant_id: str, log: Logger) -> Dict[str, Any]:
     # Get all states
     all_states = get_all_agent_states(tenant_id)
     
-    # Build insights
+    # Build insights - start from the placeholders, then overwrite the
+    # agents that actually have state, in a single dict construction
     insights = {
         'tenant_id': tenant_id,
-        'agents': {}
+        'agents': {
+            **_PLACEHOLDER,
+            **{agent_name: _summarize(agent_name, state) for agent_name, state in all_states.items()}
+        }
     }
     
-    # Process each agent's state
-    for agent_name, state in all_states.items():
-        if agent_name == 'TaskSmith':
-            insights['agents']['TaskSmith'] = {
-                'status': 'active',
-                'summary': f"Processed {state.get('epic_key', 'unknown epic')}, created {state.get('subtasks_created', 0)} subtasks"
-            }
-        else:
-            insights['agents'][agent_name] = {
-                'status': 'active',
-                'summary': 'Agent data available'
-            }
-    
-    # Add placeholder for agents we haven't built yet
-    for agent_name in ['CareTrack', 'DealFlow', 'MindMesh', 'RoadmapSmith']:
-        if agent_name not in insights['agents']:
-            insights['agents'][agent_name] = {
-                'status': 'not_implemented',
-                'summary': 'Coming soon'
-            }
-    
     return insights
 
 
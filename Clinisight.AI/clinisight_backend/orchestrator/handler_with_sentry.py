@@ -16,27 +16,89 @@ To use this file:
 
 import json
 import os
-from typing import Dict, Any, Optional
+import time
+from contextlib import nullcontext
+from typing import Dict, Any, Optional, Tuple
 import boto3
 import sentry_sdk
+from botocore.config import Config
 
 # Initialize Sentry FIRST (before other imports)
 from sentry_init import init_sentry
-init_sentry()
+init_sentry(lambda_function="orchestrator")
 
 # Import our shared utilities
-from shared.logger import Logger
+from shared.logger import Logger, LoggerBufferConfig, flush_logs
 from shared.security import validate_tenant_id, sanitize_for_logging
 
+# orjson is a C-accelerated JSON library (several times faster than stdlib json).
+# Fall back to stdlib json if it's not installed (e.g. running locally).
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so except clauses still work.
+try:
+    import orjson
+
+    # orjson returns bytes, but response bodies must be str: the Lambda runtime
+    # JSON-encodes the whole response dict and can't serialize bytes
+    # ("Unable to marshal response"). Keep the .decode().
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    # Lambda invoke payloads can be bytes - no decode/re-encode round trip
+    _dumpb = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    _dumps = json.dumps
+    _loads = json.loads
+
+    def _dumpb(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
 # ============================================
 # INITIALIZE AWS CLIENTS
 # ============================================
 
-lambda_client = boto3.client('lambda')
+# Module scope so the client (and its open connections) survive across warm
+# invocations. Keepalive + a bigger pool avoid a new TCP/TLS handshake per
+# invoke under bursts; adaptive retries back off when Lambda throttles us.
+# read_timeout must outlast the agents' 60s timeout (serverless.yml): a
+# synchronous invoke that times out on the read is retried by botocore,
+# which runs the agent a second time.
+lambda_client = boto3.client('lambda', config=Config(
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    connect_timeout=1,
+    read_timeout=70,
+    retries={'max_attempts': 2, 'mode': 'adaptive'}
+))
 REGION = os.environ.get('AWS_REGION', 'us-east-1')
 STAGE = os.environ.get('STAGE', 'dev')
 SERVICE_NAME = 'clinisight-backend'
 
+# AWS always delivers events as dicts. JSON-string events only come from
+# CLI testing - set ENABLE_CLI=1 to accept them.
+_ALLOW_STR_EVENT = os.environ.get('ENABLE_CLI') == '1'
+
+# Rovo dashboards poll /rovo/insights - reuse a tenant's result for this many
+# seconds instead of hitting DynamoDB on every poll (0 = no caching)
+ROVO_CACHE_TTL = float(os.environ.get('ROVO_CACHE_TTL', '0'))
+_INSIGHTS_CACHE_MAX = 1024
+
+# tenant_id -> (expires_at, insights), per warm container
+_INSIGHTS_CACHE: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
+def _trace_sampled() -> bool:
+    """True if the current Sentry transaction is sampled (its tags will be sent)."""
+    transaction = sentry_sdk.Hub.current.scope.transaction
+    return transaction is not None and bool(transaction.sampled)
+
+
+def _maybe_span(op: str, description: str):
+    """A Sentry span if this transaction is sampled, otherwise a no-op context."""
+    if _trace_sampled():
+        return sentry_sdk.start_span(op=op, description=description)
+    return nullcontext()
+
 
 # ============================================
 # LAMBDA HANDLER (Main Entry Point)
@@ -44,33 +106,43 @@ SERVICE_NAME = 'clinisight-backend'
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Orchestrator Lambda handler with Sentry integration."""
 
-    # Set Sentry context
-    sentry_sdk.set_tag("lambda_function", "orchestrator")
-    sentry_sdk.set_tag("stage", STAGE)
+    # Static tags (lambda_function, stage) are set once in init_sentry()
 
     # ========================================
-    # STEP 0: Handle CLI invocation
+    # STEP 0: Handle CLI invocation (ENABLE_CLI=1 only)
     # ========================================
-    if isinstance(event, str):
+    if _ALLOW_STR_EVENT and isinstance(event, str):
         try:
-            event = json.loads(event)
+            event = _loads(event)
         except json.JSONDecodeError:
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json'},
-                'body': json.dumps({
-                    'error': 'Invalid JSON in event',
-                    'orchestrator': 'error'
-                })
-            }
+            event = None
+
+    # Anything that isn't a JSON object by now (a string event without
+    # ENABLE_CLI, invalid or non-object JSON) gets a 400, not a crash below
+    if not isinstance(event, dict):
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json'},
+            'body': _dumps({
+                'error': 'Invalid JSON in event',
+                'orchestrator': 'error'
+            })
+        }
+
+    # Warmer ping (EventBridge schedule in serverless.yml) - its only job is
+    # to keep this container warm, so return before doing any real work
+    if event.get('warmer') is True:
+        return {'statusCode': 200, 'body': 'warm'}
 
     # ========================================
     # STEP 1: Parse Event Source
     # ========================================
     event_source = determine_event_source(event)
 
-    print(f"📥 Event received from: {event_source}")
-    print(f"📋 Raw event: {sanitize_for_logging(event)}")
+    # The event source is logged with "Orchestrator invoked" below.
+    # Dumping the whole (sanitized) event is for debugging only.
+    if STAGE == 'dev':
+        print(f"📋 Raw event: {sanitize_for_logging(event)}")
 
     # ========================================
     # STEP 2: Extract Event Data
@@ -93,7 +165,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             event_data = {}
         else:
             # Handle POST requests
-            body = json.loads(event.get('body') or '{}')
+            body = _loads(event.get('body') or '{}')
             event_type = body.get('eventType', 'UNKNOWN')
             tenant_id = body.get('tenantId', 'unknown')
             event_data = body.get('data', {})
@@ -108,7 +180,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         tenant_id = event.get('tenantId', 'unknown')
         event_data = event.get('data', {})
 
-    # Set Sentry user context
+    # Set Sentry user context - cheap scope writes, and every error captured
+    # below (here or in invoke_agent) carries them, sampled trace or not
     sentry_sdk.set_user({"id": tenant_id})
     sentry_sdk.set_tag("event_type", event_type)
 
@@ -119,7 +192,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return {
             'statusCode': 400,
             'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
+            'body': _dumps({
                 'error': 'Invalid or missing tenantId',
                 'provided': tenant_id
             })
@@ -128,7 +201,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     # ========================================
     # STEP 4: Initialize Logger
     # ========================================
-    log = Logger("Orchestrator", tenant_id)
+    # Info messages are buffered and written together at the end of the
+    # invocation (see finally below) instead of one print per message
+    log = Logger("Orchestrator", tenant_id, buffer_config=LoggerBufferConfig())
 
     log.info("Orchestrator invoked", {
         "source": event_source,
@@ -150,16 +225,13 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return {
             'statusCode': 200,
             'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps(result)
+            'body': _dumps(result)
         }
 
     except Exception as e:
-        # Capture to Sentry with full context
+        # Capture to Sentry with full context (user/tags set above)
+        # (one event - the exception already says which event type failed)
         sentry_sdk.capture_exception(e)
-        sentry_sdk.capture_message(
-            f"Orchestrator failed for event type: {event_type}",
-            level="error"
-        )
 
         log.error("Orchestrator failed", error=e, data={
             "event_type": event_type
@@ -169,23 +241,37 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return {
             'statusCode': 500,
             'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
+            'body': _dumps({
                 'error': str(e),
                 'event_type': event_type
             })
         }
 
+    finally:
+        # Write the buffered messages, then make sure they're all out
+        # before AWS freezes the container
+        log.flush_buffer()
+        flush_logs()
+
 
 # ============================================
 # EVENT SOURCE DETECTION
 # ============================================
+# Keys that mark each event source
+_APIGW = frozenset({'httpMethod', 'headers'})
+_EB = frozenset({'source', 'detail-type'})
+
+
 def determine_event_source(event: Dict[str, Any]) -> str:
     """Figure out where the event came from."""
 
-    if 'httpMethod' in event and 'headers' in event:
+    # Subset checks against the key view run entirely in C
+    keys = event.keys()
+
+    if _APIGW <= keys:
         return 'api_gateway'
 
-    if 'source' in event and 'detail-type' in event:
+    if _EB <= keys:
         return 'eventbridge'
 
     return 'direct'
@@ -203,56 +289,73 @@ def route_event(
     """Route event to the appropriate agent with performance tracking."""
 
     # Start performance span
-    with sentry_sdk.start_span(op="orchestrator.route", description=f"Route {event_type}"):
+    with _maybe_span("orchestrator.route", f"Route {event_type}"):
         log.info("Routing event", {
             "event_type": event_type,
             "has_data": bool(event_data)
         })
 
         # ========================================
-        # ROUTING RULES
+        # ROUTING RULES (see _ROUTES below)
         # ========================================
-        if event_type == 'EPIC_CREATED' or event_type == 'JIRA_EPIC_CREATED':
-            log.info("Routing to TaskSmith")
+        handler = _ROUTES.get(event_type)
 
-            epic_key = event_data.get('epicKey') or event_data.get('issue', {}).get('key')
-            epic_summary = event_data.get('epicSummary') or event_data.get('issue', {}).get('fields', {}).get('summary')
+        if handler is None:
+            log.warning("Unknown event type", {
+                "event_type": event_type
+            })
 
-            payload = {
-                'tenantId': tenant_id,
-                'epicKey': epic_key,
-                'epicSummary': epic_summary
-            }
+            raise ValueError(f"Unknown event type: {event_type}")
 
-            result = invoke_agent('tasksmith', payload, log)
-            return result
+        return handler(tenant_id, event_data, log)
 
-        elif event_type == 'SCHEDULED_CHECK' or event_type == 'CARETRACK_CHECK':
-            log.info("Routing to CareTrack")
 
-            payload = {
-                'tenantId': tenant_id
-            }
+def _to_tasksmith(tenant_id: str, event_data: Dict[str, Any], log: Logger) -> Dict[str, Any]:
+    """Epic created in Jira → TaskSmith"""
+    log.info("Routing to TaskSmith")
 
-            # Placeholder for CareTrack
-            return {
-                'agent': 'CareTrack',
-                'status': 'not_implemented',
-                'message': 'CareTrack agent coming soon!'
-            }
+    epic_key = event_data.get('epicKey') or event_data.get('issue', {}).get('key')
+    epic_summary = event_data.get('epicSummary') or event_data.get('issue', {}).get('fields', {}).get('summary')
 
-        elif event_type == 'ROVO_INSIGHTS':
-            log.info("Fetching Rovo insights")
+    payload = {
+        'tenantId': tenant_id,
+        'epicKey': epic_key,
+        'epicSummary': epic_summary
+    }
 
-            insights = get_rovo_insights(tenant_id, log)
-            return insights
+    # Fire-and-forget - TaskSmith saves its results to DynamoDB
+    result = invoke_agent('tasksmith', payload, log, synchronous=False)
+    return result
 
-        else:
-            log.warning("Unknown event type", {
-                "event_type": event_type
-            })
 
-            raise ValueError(f"Unknown event type: {event_type}")
+def _to_caretrack(tenant_id: str, event_data: Dict[str, Any], log: Logger) -> Dict[str, Any]:
+    """Scheduled workflow check → CareTrack"""
+    log.info("Routing to CareTrack")
+
+    # Placeholder for CareTrack
+    return {
+        'agent': 'CareTrack',
+        'status': 'not_implemented',
+        'message': 'CareTrack agent coming soon!'
+    }
+
+
+def _to_rovo(tenant_id: str, event_data: Dict[str, Any], log: Logger) -> Dict[str, Any]:
+    """Rovo requesting insights → Get all agent states"""
+    log.info("Fetching Rovo insights")
+
+    insights = get_rovo_insights(tenant_id, log)
+    return insights
+
+
+# Event type → handler function, built once at import time
+_ROUTES = {
+    'EPIC_CREATED': _to_tasksmith,
+    'JIRA_EPIC_CREATED': _to_tasksmith,
+    'SCHEDULED_CHECK': _to_caretrack,
+    'CARETRACK_CHECK': _to_caretrack,
+    'ROVO_INSIGHTS': _to_rovo
+}
 
 
 # ============================================
@@ -261,32 +364,52 @@ def route_event(
 def invoke_agent(
     agent_name: str,
     payload: Dict[str, Any],
-    log: Logger
+    log: Logger,
+    synchronous: bool = True
 ) -> Dict[str, Any]:
-    """Invoke another Lambda function with Sentry performance tracking."""
+    """
+    Invoke another Lambda function with Sentry performance tracking.
+
+    With synchronous=False the agent is invoked with InvocationType='Event'
+    and {"agent": ..., "status": "queued"} is returned right away.
+    """
 
     function_name = f"{SERVICE_NAME}-{STAGE}-{agent_name}"
 
     log.info("Invoking agent Lambda", {
         "agent": agent_name,
-        "function_name": function_name
+        "function_name": function_name,
+        "synchronous": synchronous
     })
 
     # Track Lambda invocation performance
-    with sentry_sdk.start_span(op="lambda.invoke", description=f"Invoke {agent_name}"):
+    with _maybe_span("lambda.invoke", f"Invoke {agent_name}"):
         try:
+            if not synchronous:
+                # Lambda queues the event and returns immediately
+                lambda_client.invoke(
+                    FunctionName=function_name,
+                    InvocationType='Event',
+                    Payload=_dumpb(payload)
+                )
+
+                return {
+                    'agent': agent_name,
+                    'status': 'queued'
+                }
+
             response = lambda_client.invoke(
                 FunctionName=function_name,
                 InvocationType='RequestResponse',
-                Payload=json.dumps(payload)
+                Payload=_dumpb(payload)
             )
 
-            response_payload = response['Payload'].read()
-            result = json.loads(response_payload)
+            # API Gateway format: {"statusCode": 200, "body": "{...}"}
+            result = _loads(response['Payload'].read())
 
             if 'body' in result:
                 if isinstance(result['body'], str):
-                    body = json.loads(result['body'])
+                    body = _loads(result['body'])
                 else:
                     body = result['body']
 
@@ -313,38 +436,55 @@ def invoke_agent(
 # ============================================
 # ROVO INSIGHTS
 # ============================================
+def _summarize(agent_name: str, state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn one agent's saved state (None = no state yet) into its Rovo dashboard entry."""
+    if state is None:
+        # TaskSmith is built, it just hasn't processed an epic for this tenant yet
+        if agent_name == 'TaskSmith':
+            return {'status': 'idle', 'summary': 'No epics processed yet'}
+        return {'status': 'not_implemented', 'summary': 'Coming soon'}
+
+    if agent_name == 'TaskSmith':
+        return {
+            'status': 'active',
+            'summary': f"Processed {state.get('epic_key', 'unknown epic')}, created {state.get('subtasks_created', 0)} subtasks"
+        }
+
+    return {'status': 'active', 'summary': 'Agent data available'}
+
+
 def get_rovo_insights(tenant_id: str, log: Logger) -> Dict[str, Any]:
-    """Get insights from all agents for Rovo dashboard."""
+    """Get insights from all agents for Rovo dashboard (cached for ROVO_CACHE_TTL seconds)."""
+
+    now = time.monotonic()
 
-    from shared.database import get_all_agent_states
+    if ROVO_CACHE_TTL > 0:
+        hit = _INSIGHTS_CACHE.get(tenant_id)
+        if hit and hit[0] > now:
+            return hit[1]
+
+    from shared.database import batch_get_states, ALL_AGENTS
 
     log.info("Fetching all agent states for Rovo")
 
-    all_states = get_all_agent_states(tenant_id)
+    # One BatchGetItem request for every agent
+    all_states = batch_get_states(tenant_id, ALL_AGENTS)
 
+    # One dict built in one pass over the agent list: summarize the state if
+    # the agent has one, otherwise it's an agent we haven't built yet
     insights = {
         'tenant_id': tenant_id,
-        'agents': {}
+        'agents': {
+            agent_name: _summarize(agent_name, all_states.get(agent_name))
+            for agent_name in ALL_AGENTS
+        }
     }
 
-    for agent_name, state in all_states.items():
-        if agent_name == 'TaskSmith':
-            insights['agents']['TaskSmith'] = {
-                'status': 'active',
-                'summary': f"Processed {state.get('epic_key', 'unknown epic')}, created {state.get('subtasks_created', 0)} subtasks"
-            }
-        else:
-            insights['agents'][agent_name] = {
-                'status': 'active',
-                'summary': 'Agent data available'
-            }
-
-    for agent_name in ['CareTrack', 'DealFlow', 'MindMesh', 'RoadmapSmith']:
-        if agent_name not in insights['agents']:
-            insights['agents'][agent_name] = {
-                'status': 'not_implemented',
-                'summary': 'Coming soon'
-            }
+    if ROVO_CACHE_TTL > 0:
+        # Crude size cap - tenants are few, so this rarely (if ever) triggers
+        if len(_INSIGHTS_CACHE) >= _INSIGHTS_CACHE_MAX:
+            _INSIGHTS_CACHE.clear()
+        _INSIGHTS_CACHE[tenant_id] = (now + ROVO_CACHE_TTL, insights)
 
     return insights
 
@@ -11,19 +11,24 @@ Usage:
 """
 
 import os
+from typing import Optional
+
 import sentry_sdk
 from sentry_sdk.integrations.aws_lambda import AwsLambdaIntegration
 
 
-def init_sentry():
+def init_sentry(lambda_function: Optional[str] = None):
     """
     Initialize Sentry for Lambda functions.
 
     Features:
     - AWS Lambda integration (automatic error capture)
-    - Timeout warnings (alerts before Lambda times out)
-    - Performance monitoring (traces sample rate)
+    - Timeout warnings (dev only - the watchdog runs on every invocation)
+    - Performance monitoring (see traces_sampler below)
     - Environment tagging (dev/prod separation)
+
+    Args:
+        lambda_function: Name to tag every event with (e.g., "orchestrator")
     """
 
     sentry_dsn = os.environ.get('SENTRY_DSN')
@@ -32,29 +37,61 @@ def init_sentry():
         print("⚠️ SENTRY_DSN not set - error tracking disabled")
         return
 
-    environment = os.environ.get('STAGE', 'development')
+    # Same default as STAGE in the handlers, so the stage tag and the
+    # environment don't change when STAGE is unset
+    environment = os.environ.get('STAGE', 'dev')
 
     sentry_sdk.init(
         dsn=sentry_dsn,
 
-        # AWS Lambda integration with timeout warnings
+        # AWS Lambda integration, with timeout warnings in dev only
         integrations=[
-            AwsLambdaIntegration(timeout_warning=True)
+            AwsLambdaIntegration(timeout_warning=environment == 'dev')
         ],
 
         # Environment tracking (dev/prod)
         environment=environment,
 
-        # Performance monitoring (10% sample rate)
-        traces_sample_rate=0.1,
+        # Performance monitoring (decided per request)
+        traces_sampler=traces_sampler,
+
+        # No profiling
+        profiles_sample_rate=0,
 
         # Tag all errors with service
         before_send=add_service_context,
     )
 
+    # Tags that never change for the life of the process - set once on the
+    # root scope, which every invocation's scope inherits, so handlers
+    # don't pay for set_tag() on every request
+    with sentry_sdk.configure_scope() as scope:
+        scope.set_tag('stage', environment)
+        if lambda_function:
+            scope.set_tag('lambda_function', lambda_function)
+
     print(f"✅ Sentry initialized for environment: {environment}")
 
 
+def traces_sampler(sampling_context):
+    """
+    Decide what fraction of invocations to trace.
+
+    - GET /rovo/insights (dashboard polling): never - high volume, low value
+    - Everything else: 1%
+    """
+    aws_event = sampling_context.get('aws_event')
+
+    if (
+        isinstance(aws_event, dict)
+        and aws_event.get('httpMethod') == 'GET'
+        and '/rovo/insights' in (aws_event.get('path') or '')
+    ):
+        return 0.0
+
+    return 0.01
+
+
 def add_service_context(event, hint):
     """
     Add additional context to all Sentry events.
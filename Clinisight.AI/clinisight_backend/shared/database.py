@@ -10,34 +10,203 @@ Why this file exists:
 
 What it provides:
 - save_state() - Save agent data
+- batch_save_states() - Save several agents' data at once
 - get_state() - Retrieve agent data  
+- batch_get_states() - Retrieve several agents' data at once
 - delete_state() - Clean up data
+- log_audit_event() / flush_audit_events() - HIPAA audit trail
+- audit_request_scope() - log repeated reads once per request
 - All with built-in error handling
 """
 
+import atexit
+import functools
+import itertools
 import os
-import uuid
-import boto3
-from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, Optional
+import queue
+import random
+import secrets
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timezone, timedelta
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+# Get table names from environment variables (set in serverless.yml)
+STATE_TABLE_NAME = os.environ.get('AGENT_STATE_TABLE', 'ClinisightAgentState-dev')
+AUDIT_LOG_TABLE_NAME = os.environ.get('AUDIT_LOG_TABLE', 'ClinisightAuditLog-dev')
+
+# DAX (DynamoDB Accelerator) is an in-memory cache in front of DynamoDB.
+# Set USE_DAX=true and DAX_ENDPOINT to route agent state reads/writes
+# through it (sub-millisecond reads instead of a full DynamoDB round trip).
+# The DAX resource has the same Table API, so callers don't change.
+USE_DAX = os.environ.get('USE_DAX', '').lower() in ('1', 'true', 'yes')
+
 
 # ============================================
 # INITIALIZE DYNAMODB CLIENT
 # ============================================
-# boto3.resource gives us high-level interface (easier than client)
-dynamodb = boto3.resource('dynamodb')
+# Everything below is created on first use, not at import time: importing
+# boto3 and building resources is a big chunk of Lambda cold start, and
+# handlers that never touch DynamoDB shouldn't pay for it.
+# functools.cache makes each one a singleton for the life of the container.
+
+@functools.cache
+def _dynamodb():
+    """DynamoDB resource (boto3.resource is the high-level interface - easier than client)."""
+    import boto3
+    return boto3.resource('dynamodb')
+
+
+@functools.cache
+def _state_resource():
+    """Resource for agent state - DAX if enabled, plain DynamoDB otherwise."""
+    if USE_DAX:
+        from amazondax import AmazonDaxClient
+        return AmazonDaxClient.resource(endpoint_url=os.environ['DAX_ENDPOINT'])
+    return _dynamodb()
+
+
+@functools.cache
+def _dynamodb_client():
+    """Plain low-level DynamoDB client (never DAX)."""
+    import boto3
+    from botocore.config import Config
+    return boto3.client('dynamodb', config=Config(max_pool_connections=32, tcp_keepalive=True))
+
+
+@functools.cache
+def _ddb_client():
+    """
+    Low-level client for agent state (DAX if enabled).
+    
+    Skips the resource layer's per-call Python wrapping - used on the
+    hottest paths, save_state() and get_state(), with typed items and keys.
+    """
+    if USE_DAX:
+        from amazondax import AmazonDaxClient
+        return AmazonDaxClient(endpoint_url=os.environ['DAX_ENDPOINT'])
+    
+    return _dynamodb_client()
+
+
+@functools.cache
+def _deserializer():
+    """Converts low-level typed values ({'S': 'abc'}) back to Python values."""
+    from boto3.dynamodb.types import TypeDeserializer
+    return TypeDeserializer()
+
+
+@functools.cache
+def _serializer():
+    """Converts Python values to low-level typed values - fallback for _to_ddb()."""
+    from boto3.dynamodb.types import TypeSerializer
+    return TypeSerializer()
+
+
+def _to_ddb(value: Any) -> Dict[str, Any]:
+    """
+    Convert a Python value to DynamoDB's typed wire format.
+    
+    Handles the types our state actually contains (str, int, bool, None,
+    dicts, lists) directly - much cheaper than boto3's TypeSerializer,
+    which is only used for anything else (Decimal, bytes, sets, ...).
+    
+    Example:
+        >>> _to_ddb({"epic_key": "HC-100", "subtasks_created": 5})
+        {'M': {'epic_key': {'S': 'HC-100'}, 'subtasks_created': {'N': '5'}}}
+    """
+    if isinstance(value, str):
+        return {'S': value}
+    # bool before int - True is an int in Python
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, int):
+        return {'N': str(value)}
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, Mapping):
+        return {'M': {key: _to_ddb(item) for key, item in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {'L': [_to_ddb(item) for item in value]}
+    return _serializer().serialize(value)
 
-# Get table names from environment variables (set in serverless.yml)
-STATE_TABLE_NAME = os.environ.get('AGENT_STATE_TABLE', 'ClinisightAgentState-dev')
-AUDIT_LOG_TABLE_NAME = os.environ.get('AUDIT_LOG_TABLE', 'ClinisightAuditLog-dev')
 
 # Get references to the tables
 # This doesn't create the tables - serverless.yml already did that
-state_table = dynamodb.Table(STATE_TABLE_NAME)
-audit_log_table = dynamodb.Table(AUDIT_LOG_TABLE_NAME)
+@functools.cache
+def _state_table():
+    """Agent state table."""
+    return _state_resource().Table(STATE_TABLE_NAME)
+
+
+@functools.cache
+def _audit_log_table():
+    """Audit log table, for queries - skips DAX and goes straight to DynamoDB."""
+    return _dynamodb().Table(AUDIT_LOG_TABLE_NAME)
+
 
 # HIPAA requires 7 years data retention (2556 days)
 HIPAA_RETENTION_DAYS = 2556
+_RETENTION_DELTA = timedelta(days=HIPAA_RETENTION_DAYS)
+
+# Every agent on the platform (the agentName sort keys in the state table)
+ALL_AGENTS = ('CareTrack', 'DealFlow', 'MindMesh', 'RoadmapSmith', 'TaskSmith')
+
+
+# BatchWriteItem accepts at most 25 items per request
+BATCH_WRITE_LIMIT = 25
+
+# How many times unprocessed batch items/keys are retried before giving up
+# (under sustained throttling, retrying forever would hang until the
+# Lambda times out)
+BATCH_MAX_RETRIES = 5
+
+
+def _backoff(attempt: int) -> None:
+    """Sleep before retrying unprocessed batch items (50ms, 100ms, ... capped at 1s)."""
+    time.sleep(min(0.05 * 2 ** attempt, 1.0))
+
+
+def _batch_write(resource, table_name: str, items: Iterable[Dict[str, Any]]) -> None:
+    """
+    Put any number of items with BatchWriteItem.
+    
+    Splits the items into requests of 25 (the DynamoDB limit) and retries
+    whatever DynamoDB reports back as UnprocessedItems, with backoff, up to
+    BATCH_MAX_RETRIES times. Works with a resource (plain items) or a
+    low-level client (typed items).
+    Raises on errors, including items still unprocessed after the last
+    retry - callers decide how to report them.
+    """
+    items = iter(items)
+    
+    while True:
+        chunk = list(itertools.islice(items, BATCH_WRITE_LIMIT))
+        if not chunk:
+            return
+        
+        request_items = {
+            table_name: [{'PutRequest': {'Item': item}} for item in chunk]
+        }
+        attempt = 0
+        
+        while request_items:
+            response = resource.batch_write_item(RequestItems=request_items)
+            
+            # Throttled writes come back here - retry just those
+            request_items = response.get('UnprocessedItems')
+            if request_items:
+                if attempt == BATCH_MAX_RETRIES:
+                    left = sum(len(requests) for requests in request_items.values())
+                    raise RuntimeError(
+                        f"{left} items still unprocessed after {BATCH_MAX_RETRIES} retries"
+                    )
+                _backoff(attempt)
+                attempt += 1
 
 
 # ============================================
@@ -69,6 +238,27 @@ def save_state(tenant_id: str, agent_name: str, data: Dict[str, Any]) -> bool:
         - stateData: {...your data...}
         - updatedAt: "2025-01-15T10:05:00Z"
     """
+    return _put_state(tenant_id, agent_name, data)[0]
+
+
+def _put_state(
+    tenant_id: str,
+    agent_name: str,
+    data: Dict[str, Any],
+    return_old: bool = False
+) -> Tuple[bool, bool]:
+    """
+    Write the state item and, if asked, report whether it replaced an existing one.
+    
+    Args:
+        return_old: Ask DynamoDB for the replaced item (ReturnValues=ALL_OLD).
+            Only set this when you need `existed` - the whole old item
+            comes back over the wire just to be looked at.
+    
+    Returns:
+        (success, existed) - existed is True if the write was an update
+        (always False unless return_old is set)
+    """
     try:
         # Build the item to save
         item = {
@@ -85,14 +275,67 @@ def save_state(tenant_id: str, agent_name: str, data: Dict[str, Any]) -> bool:
         
         # put_item = create or replace item
         # This is like: INSERT OR REPLACE in SQL
-        state_table.put_item(Item=item)
+        # Low-level client with our own marshalling (see _to_ddb)
+        # ALL_OLD hands back the replaced item (if any), so callers can tell
+        # CREATE from UPDATE without a separate read
+        response = _ddb_client().put_item(
+            TableName=STATE_TABLE_NAME,
+            Item=_to_ddb(item)['M'],
+            ReturnValues='ALL_OLD' if return_old else 'NONE'
+        )
         
-        print(f"✅ Saved state for {agent_name} (tenant: {tenant_id})")
-        return True
+        print(f"[OK] Saved state for {agent_name} (tenant: {tenant_id})")
+        return True, 'Attributes' in response
         
     except Exception as e:
         # If anything goes wrong, log it but don't crash
-        print(f"❌ Error saving state: {str(e)}")
+        print(f"[ERR] Error saving state: {str(e)}")
+        return False, False
+
+
+# ============================================
+# BATCH SAVE STATE FUNCTION
+# ============================================
+def batch_save_states(tenant_id: str, states: Dict[str, Dict[str, Any]]) -> bool:
+    """
+    Save state for several agents of one tenant in as few requests as possible.
+    
+    Args:
+        tenant_id: Customer identifier
+        states: Dictionary mapping agent names to their data
+    
+    Returns:
+        True if successful, False if error
+    
+    Example:
+        batch_save_states("acme", {
+            "TaskSmith": {"epic_key": "HC-100", "subtasks_created": 5},
+            "CareTrack": {"last_check": "2025-01-15T10:00:00Z"}
+        })
+    
+    Items are written exactly like save_state() writes them, in
+    BatchWriteItem requests of up to 25 items each.
+    """
+    try:
+        updated_at = datetime.now(timezone.utc).isoformat()
+        
+        items = (
+            {
+                'tenantId': tenant_id,
+                'agentName': agent_name,
+                'stateData': data,
+                'updatedAt': updated_at,
+            }
+            for agent_name, data in states.items()
+        )
+        
+        _batch_write(_state_resource(), STATE_TABLE_NAME, items)
+        
+        print(f"[OK] Saved state for {len(states)} agents (tenant: {tenant_id})")
+        return True
+        
+    except Exception as e:
+        print(f"[ERR] Error saving states: {str(e)}")
         return False
 
 
@@ -119,24 +362,29 @@ def get_state(tenant_id: str, agent_name: str) -> Optional[Dict[str, Any]]:
     """
     try:
         # get_item = fetch one item by primary key
-        # This is like: SELECT * WHERE tenantId=? AND agentName=?
-        response = state_table.get_item(
+        # This is like: SELECT stateData WHERE tenantId=? AND agentName=?
+        # Low-level client, so keys are written with their types ('S' = string)
+        response = _ddb_client().get_item(
+            TableName=STATE_TABLE_NAME,
             Key={
-                'tenantId': tenant_id,
-                'agentName': agent_name
-            }
+                'tenantId': {'S': tenant_id},
+                'agentName': {'S': agent_name}
+            },
+            ProjectionExpression='stateData'
         )
         
         # Check if item exists
         if 'Item' in response:
             # Return just the data part, not metadata
-            return response['Item'].get('stateData', {})
+            # Only stateData needs converting back to Python values
+            state_data = response['Item'].get('stateData')
+            return _deserializer().deserialize(state_data) if state_data else {}
         else:
-            print(f"ℹ️ No state found for {agent_name} (tenant: {tenant_id})")
+            print(f"[INFO] No state found for {agent_name} (tenant: {tenant_id})")
             return None
             
     except Exception as e:
-        print(f"❌ Error getting state: {str(e)}")
+        print(f"[ERR] Error getting state: {str(e)}")
         return None
 
 
@@ -161,35 +409,51 @@ def delete_state(tenant_id: str, agent_name: str) -> bool:
     """
     try:
         # delete_item = remove item by primary key
-        state_table.delete_item(
+        _state_table().delete_item(
             Key={
                 'tenantId': tenant_id,
                 'agentName': agent_name
             }
         )
         
-        print(f"✅ Deleted state for {agent_name} (tenant: {tenant_id})")
+        print(f"[OK] Deleted state for {agent_name} (tenant: {tenant_id})")
         return True
         
     except Exception as e:
-        print(f"❌ Error deleting state: {str(e)}")
+        print(f"[ERR] Error deleting state: {str(e)}")
         return False
 
 
 # ============================================
-# QUERY ALL AGENTS FOR A TENANT
+# GET SEVERAL AGENTS FOR A TENANT
 # ============================================
-def get_all_agent_states(tenant_id: str) -> Dict[str, Dict[str, Any]]:
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_LIMIT = 100
+
+# Only read what callers use - skips updatedAt and any other attributes
+STATE_PROJECTION = 'agentName, stateData'
+
+# Page size for the Query fallback (keeps each request's latency bounded)
+QUERY_PAGE_SIZE = 25
+
+
+def batch_get_states(tenant_id: str, agent_names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
     """
-    Get state for ALL agents belonging to a tenant.
+    Get state for the given agents of a tenant.
+    
+    This uses DynamoDB BatchGetItem:
+    - Fetches every requested agent by primary key
+    - One network round trip instead of one per agent
+    - Agents that haven't saved state yet are simply missing
+    - So are agents DynamoDB still hasn't returned after BATCH_MAX_RETRIES
+      retries of its UnprocessedKeys (a warning is printed)
     
-    This uses DynamoDB Query (not Scan):
-    - Query is efficient (uses partition key)
-    - Returns all items in one partition
-    - Sorted by agent name
+    More than 100 agents (the BatchGetItem limit) falls back to a single
+    Query over the tenant's partition, keeping only the requested agents.
     
     Args:
         tenant_id: Customer identifier
+        agent_names: Which agents to fetch (e.g., ("TaskSmith", "CareTrack"))
     
     Returns:
         Dictionary mapping agent names to their state
@@ -197,34 +461,109 @@ def get_all_agent_states(tenant_id: str) -> Dict[str, Dict[str, Any]]:
             "TaskSmith": {"epic_key": "HC-100", ...},
             "CareTrack": {"last_check": "...", ...},
         }
-    
-    Why useful:
-        For Rovo insights - get all agent data in one call
     """
+    agent_names = tuple(agent_names)
+    
     try:
-        # Query = efficient lookup using partition key
-        # This is like: SELECT * WHERE tenantId = ?
-        response = state_table.query(
-            KeyConditionExpression='tenantId = :tid',
-            ExpressionAttributeValues={
-                ':tid': tenant_id
+        result = {}
+        
+        if len(agent_names) > BATCH_GET_LIMIT:
+            # Query = efficient lookup using partition key
+            # This is like: SELECT agentName, stateData WHERE tenantId = ?
+            query_args = {
+                'KeyConditionExpression': 'tenantId = :tid',
+                'ExpressionAttributeValues': {
+                    ':tid': tenant_id
+                },
+                'ProjectionExpression': STATE_PROJECTION,
+                'Limit': QUERY_PAGE_SIZE
             }
-        )
+            
+            wanted = frozenset(agent_names)
+            
+            # Follow LastEvaluatedKey until the whole partition is read
+            while True:
+                response = _state_table().query(**query_args)
+                
+                for item in response.get('Items', []):
+                    if item['agentName'] in wanted:
+                        result[item['agentName']] = item.get('stateData', {})
+                
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            
+            print(f"[OK] Retrieved {len(result)} agent states for tenant {tenant_id}")
+            return result
         
-        # Convert list of items to dictionary
-        result = {}
-        for item in response.get('Items', []):
-            agent_name = item['agentName']
-            result[agent_name] = item.get('stateData', {})
+        # batch_get_item = fetch up to 100 items by primary key in one request
+        # This is like: SELECT * WHERE (tenantId, agentName) IN (...)
+        request_items = {
+            STATE_TABLE_NAME: {
+                'Keys': [
+                    {'tenantId': tenant_id, 'agentName': agent_name}
+                    for agent_name in agent_names
+                ],
+                'ProjectionExpression': STATE_PROJECTION
+            }
+        }
+        
+        attempt = 0
+        
+        while request_items:
+            response = _state_resource().batch_get_item(RequestItems=request_items)
+            
+            # Convert list of items to dictionary
+            for item in response.get('Responses', {}).get(STATE_TABLE_NAME, []):
+                result[item['agentName']] = item.get('stateData', {})
+            
+            # DynamoDB may hand back keys it didn't get to (throttling, size limits)
+            # Retry just those, up to BATCH_MAX_RETRIES times
+            request_items = response.get('UnprocessedKeys')
+            if request_items:
+                if attempt == BATCH_MAX_RETRIES:
+                    # Return what was read - missing agents look like
+                    # agents without state, same as a partial batch
+                    left = sum(len(keys['Keys']) for keys in request_items.values())
+                    print(f"[WARN] {left} agent states still unread after {BATCH_MAX_RETRIES} retries")
+                    break
+                _backoff(attempt)
+                attempt += 1
         
-        print(f"✅ Retrieved {len(result)} agent states for tenant {tenant_id}")
+        print(f"[OK] Retrieved {len(result)} agent states for tenant {tenant_id}")
         return result
         
     except Exception as e:
-        print(f"❌ Error querying states: {str(e)}")
+        print(f"[ERR] Error querying states: {str(e)}")
         return {}
 
 
+# ============================================
+# GET ALL AGENTS FOR A TENANT
+# ============================================
+def get_all_agent_states(tenant_id: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Get state for ALL agents belonging to a tenant.
+    
+    Fetches every agent in ALL_AGENTS with batch_get_states()
+    (one BatchGetItem request).
+    
+    Args:
+        tenant_id: Customer identifier
+    
+    Returns:
+        Dictionary mapping agent names to their state
+        Example: {
+            "TaskSmith": {"epic_key": "HC-100", ...},
+            "CareTrack": {"last_check": "...", ...},
+        }
+    
+    Why useful:
+        For Rovo insights - get all agent data in one call
+    """
+    return batch_get_states(tenant_id, ALL_AGENTS)
+
+
 # ============================================
 # UNDERSTANDING: Query vs Scan
 # ============================================
@@ -260,8 +599,186 @@ Audit log entries include:
 - WHEN: timestamp (ISO 8601)
 - WHERE: resource type and keys
 - WHY: reason/context (optional)
+
+Writes happen on a background thread, batched into BatchWriteItem requests,
+so requests don't wait on DynamoDB. DELETE events are the exception -
+they're written (after anything already queued) before returning.
+Call flush_audit_events() before a Lambda handler returns.
 """
 
+# Audit entries waiting for the background writer
+_AUDIT_QUEUE_MAX = 10000
+_audit_queue: queue.Queue = queue.Queue(maxsize=_AUDIT_QUEUE_MAX)
+
+# Security-critical actions are written synchronously, never queued
+_BLOCKING_ACTIONS = frozenset({'DELETE'})
+
+# Timestamp collision suffix: "<process token>-<counter>". The token is
+# random once per process (Lambda containers often share the same PID),
+# and the counter makes every event in this process unique after that -
+# no random bytes needed per event.
+_AUDIT_PROCESS_TOKEN = f"{os.getpid():x}{secrets.token_hex(3)}"
+_audit_counter = itertools.count()
+
+# The writer sends a BatchWriteItem once it has a full batch (25 = the
+# DynamoDB limit), or once this long has passed since the batch started
+_AUDIT_BATCH_WAIT_SECONDS = 0.2
+
+_audit_worker_thread: Optional[threading.Thread] = None
+_audit_worker_lock = threading.Lock()
+
+# Audit write errors come in bursts (e.g. DynamoDB throttling), and
+# printing every one just adds to the pile. Token bucket: up to 10 error
+# messages, refilled at 10 per minute; the rest are only counted, and the
+# count goes out with the next message that is printed.
+_AUDIT_ERROR_BURST = 10
+_AUDIT_ERROR_REFILL_PER_SECOND = _AUDIT_ERROR_BURST / 60
+_audit_error_tokens = float(_AUDIT_ERROR_BURST)
+_audit_error_refilled_at = time.monotonic()
+_audit_errors_suppressed = 0
+_audit_error_lock = threading.Lock()
+
+
+@functools.cache
+def _aws_errors() -> Tuple[type, ...]:
+    """
+    botocore's error base classes, for `except _aws_errors():`.
+    
+    The except expression is only evaluated when something is raised, so
+    botocore is still not imported on the happy path.
+    """
+    from botocore.exceptions import BotoCoreError, ClientError
+    return (ClientError, BotoCoreError)
+
+
+# DynamoDB error codes that mean "slow down" rather than "this failed"
+_THROTTLE_CODES = frozenset({
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+})
+_AUDIT_THROTTLE_RETRIES = 3
+
+
+def _put_audit_item(typed_item: Dict[str, Any]) -> None:
+    """
+    Write one typed audit item synchronously.
+    
+    Throttling is retried up to 3 times after a short random sleep (the
+    jitter keeps concurrent writers from retrying in lockstep) - dropping
+    an audit entry because the table was briefly busy is a HIPAA gap.
+    Other errors are raised.
+    """
+    for attempt in range(_AUDIT_THROTTLE_RETRIES + 1):
+        try:
+            _dynamodb_client().put_item(TableName=AUDIT_LOG_TABLE_NAME, Item=typed_item)
+            return
+        except _aws_errors()[0] as e:  # ClientError
+            code = e.response.get('Error', {}).get('Code')
+            if code not in _THROTTLE_CODES or attempt == _AUDIT_THROTTLE_RETRIES:
+                raise
+            time.sleep(random.uniform(0.05, 0.2))
+
+
+def _report_audit_error(what: str, error: Exception) -> None:
+    """Print an audit write error, unless too many have been printed lately."""
+    global _audit_error_tokens, _audit_error_refilled_at, _audit_errors_suppressed
+    
+    with _audit_error_lock:
+        now = time.monotonic()
+        _audit_error_tokens = min(
+            _AUDIT_ERROR_BURST,
+            _audit_error_tokens + (now - _audit_error_refilled_at) * _AUDIT_ERROR_REFILL_PER_SECOND
+        )
+        _audit_error_refilled_at = now
+        
+        if _audit_error_tokens < 1:
+            _audit_errors_suppressed += 1
+            return
+        
+        _audit_error_tokens -= 1
+        suppressed, _audit_errors_suppressed = _audit_errors_suppressed, 0
+    
+    note = f" ({suppressed} more audit errors suppressed)" if suppressed else ""
+    print(f"[ERR] Error {what}: {str(error)}{note}")
+
+
+def _audit_worker():
+    """Runs forever in the background thread: collect a batch, write it, repeat."""
+    while True:
+        batch = [_audit_queue.get()]
+        deadline = time.monotonic() + _AUDIT_BATCH_WAIT_SECONDS
+        
+        while len(batch) < BATCH_WRITE_LIMIT:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_audit_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        try:
+            # One request for the whole batch (retries UnprocessedItems).
+            # Items are already typed, so the low-level client sends them as-is.
+            _batch_write(_dynamodb_client(), AUDIT_LOG_TABLE_NAME, batch)
+        except Exception as e:
+            _report_audit_error(f"writing {len(batch)} audit logs", e)
+        finally:
+            for _ in batch:
+                _audit_queue.task_done()
+
+
+def _start_audit_worker():
+    """Start the background audit writer (once per process)."""
+    global _audit_worker_thread
+    
+    with _audit_worker_lock:
+        if _audit_worker_thread is None:
+            _audit_worker_thread = threading.Thread(target=_audit_worker, name='audit-writer', daemon=True)
+            _audit_worker_thread.start()
+
+
+def flush_audit_events():
+    """
+    Block until every queued audit entry has been written.
+    
+    Call this at the end of a Lambda invocation - AWS freezes the container
+    as soon as the handler returns, and HIPAA audit entries must not be lost.
+    """
+    _audit_queue.join()
+
+
+# Write whatever is left when the process exits
+atexit.register(flush_audit_events)
+
+
+# Typed values for the audit defaults - one shared object each instead of
+# a new {'S': ...} wrapper per event (botocore only reads them)
+_TYPED_SYSTEM_USER = {'S': 'system'}
+_TYPED_NOT_SPECIFIED = {'S': 'Not specified'}
+_TYPED_EMPTY_MAP = {'M': {}}
+
+
+@functools.lru_cache(maxsize=64)
+def _audit_template(agent_name: str, resource_type: str, action: str) -> Dict[str, Any]:
+    """
+    The fixed part of an audit item, already in DynamoDB's typed format.
+    
+    Audit events come from a handful of (agent, resource type, action)
+    combinations, so each is built once and cached. Callers must copy()
+    the result before adding to it.
+    """
+    return _to_ddb({
+        # Who performed the action
+        'agentName': agent_name,
+
+        # What action was performed
+        'action': action.upper(),
+        'resourceType': resource_type,
+    })['M']
+
+
 def log_audit_event(
     tenant_id: str,
     action: str,
@@ -286,7 +803,9 @@ def log_audit_event(
         additional_data: Any extra context to log
 
     Returns:
-        True if logged successfully, False otherwise
+        True if logged (or queued) successfully, False if DynamoDB failed
+        (anything that isn't an AWS error - e.g. a value DynamoDB can't
+        store - is a bug and is raised)
 
     Example:
         log_audit_event(
@@ -301,33 +820,30 @@ def log_audit_event(
     """
     try:
         # Generate timestamp for sort key (high precision for uniqueness)
-        timestamp = datetime.now(timezone.utc).isoformat()
+        # One clock read for both the timestamp and the expiry
+        now = datetime.now(timezone.utc)
+        timestamp = now.isoformat()
 
         # Add unique suffix to prevent collisions for same-millisecond events
-        unique_timestamp = f"{timestamp}#{uuid.uuid4().hex[:8]}"
+        unique_timestamp = f"{timestamp}#{_AUDIT_PROCESS_TOKEN}-{next(_audit_counter):x}"
 
         # Calculate expiration time (7 years for HIPAA)
-        expires_at = datetime.now(timezone.utc) + timedelta(days=HIPAA_RETENTION_DAYS)
+        expires_at = now + _RETENTION_DELTA
 
-        # Build audit log entry
+        # Build audit log entry: the fixed part (who/what) comes ready-made
+        # from the template, then the per-event fields are added
+        typed_item = _audit_template(agent_name, resource_type, action).copy()
         item = {
             # Primary key
             'tenantId': tenant_id,
             'timestamp': unique_timestamp,
 
-            # Who performed the action
-            'agentName': agent_name,
-            'userId': user_id or 'system',
+            # Per-day partition for the tenantDay index (see query_audit_logs)
+            'tenantDay': f"{tenant_id}#{timestamp[:10]}",
 
-            # What action was performed
-            'action': action.upper(),
-            'resourceType': resource_type,
+            # Which resource
             'resourceKeys': resource_keys,
 
-            # Additional context
-            'reason': reason or 'Not specified',
-            'additionalData': additional_data or {},
-
             # HIPAA retention (7 years)
             'expiresAt': int(expires_at.timestamp()),
 
@@ -335,19 +851,90 @@ def log_audit_event(
             'createdAt': timestamp,
         }
 
-        # Write to audit log table
-        audit_log_table.put_item(Item=item)
+        # Convert to DynamoDB's typed format once, here. Every write path
+        # below uses the low-level client, so nothing converts it again -
+        # and the queued copy can't change if the caller mutates its dicts.
+        typed_item.update(_to_ddb(item)['M'])
 
-        print(f"📝 Audit: {action} by {agent_name} on {resource_type} (tenant: {tenant_id})")
+        # Who performed the action
+        typed_item['userId'] = {'S': user_id} if user_id else _TYPED_SYSTEM_USER
+
+        # Additional context
+        typed_item['reason'] = {'S': reason} if reason else _TYPED_NOT_SPECIFIED
+        typed_item['additionalData'] = _to_ddb(additional_data) if additional_data else _TYPED_EMPTY_MAP
+
+        # Write to audit log table
+        if typed_item['action']['S'] in _BLOCKING_ACTIONS:
+            # Write everything queued before it first, so the audit trail
+            # keeps its order around destructive operations
+            flush_audit_events()
+            _put_audit_item(typed_item)
+        else:
+            if _audit_worker_thread is None:
+                _start_audit_worker()
+            try:
+                _audit_queue.put_nowait(typed_item)
+            except queue.Full:
+                # Writer can't keep up - write this one ourselves rather than lose it
+                print("[WARN] Audit queue full, writing synchronously")
+                _put_audit_item(typed_item)
+
+        print(f"[AUDIT] {action} by {agent_name} on {resource_type} (tenant: {tenant_id})")
         return True
 
-    except Exception as e:
+    except _aws_errors() as e:
         # Audit logging failures should be captured but not crash the app
-        print(f"❌ Error writing audit log: {str(e)}")
+        _report_audit_error("writing audit log", e)
         # TODO: Send to Sentry as critical error
         return False
 
 
+# Audit logs are kept for 7 years, so one tenant's partition keeps growing.
+# The tenantDay GSI (partition key "tenantId#YYYY-MM-DD", sort key timestamp)
+# lets a time-range query touch only the days it covers, one small query
+# per day, run in parallel.
+AUDIT_DAY_INDEX = 'tenantDay-index'
+_AUDIT_QUERY_WORKERS = 10
+
+# Longer ranges fall back to one query on the tenant partition
+# (hundreds of per-day queries would cost more than they save)
+_AUDIT_MAX_FANOUT_DAYS = 31
+
+
+def _to_utc(timestamp: str) -> datetime:
+    """Parse an ISO 8601 timestamp into an aware UTC datetime (no offset = UTC)."""
+    parsed = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+# Audit items written before tenantDay was added aren't in the index.
+# AUDIT_DAY_INDEX_SINCE is the UTC time from which every item has it (the
+# deploy that added it, or the end of a backfill). Ranges starting before
+# it - and every range while it's unset - query the tenant partition.
+_AUDIT_DAY_INDEX_SINCE = (
+    _to_utc(os.environ['AUDIT_DAY_INDEX_SINCE']) if os.environ.get('AUDIT_DAY_INDEX_SINCE') else None
+)
+
+
+def _query_audit_day(tenant_id: str, day: date, start_time: str, end_time: str, limit: int) -> list:
+    """Query one day's audit partition of the tenantDay index."""
+    response = _audit_log_table().query(
+        IndexName=AUDIT_DAY_INDEX,
+        KeyConditionExpression='tenantDay = :day AND #ts BETWEEN :start AND :end',
+        ExpressionAttributeNames={'#ts': 'timestamp'},
+        ExpressionAttributeValues={
+            ':day': f"{tenant_id}#{day.isoformat()}",
+            ':start': start_time,
+            ':end': end_time
+        },
+        ScanIndexForward=False,  # Newest first
+        Limit=limit
+    )
+    return response.get('Items', [])
+
+
 def query_audit_logs(
     tenant_id: str,
     start_time: Optional[str] = None,
@@ -357,6 +944,12 @@ def query_audit_logs(
     """
     Query audit logs for a tenant within a time range.
 
+    Ranges of up to a month are read day by day from the tenantDay index,
+    in parallel; longer ranges, and ranges starting before the index has
+    every item (AUDIT_DAY_INDEX_SINCE), query the whole tenant partition.
+    Times with a UTC offset are converted to UTC first - audit timestamps
+    are stored in UTC.
+
     Args:
         tenant_id: Customer identifier
         start_time: ISO 8601 timestamp (default: 24 hours ago)
@@ -377,32 +970,56 @@ def query_audit_logs(
     """
     try:
         # Default time range: last 24 hours
-        if not start_time:
-            start_time = (datetime.now(timezone.utc) - timedelta(hours=24)).isoformat()
-        if not end_time:
-            end_time = datetime.now(timezone.utc).isoformat()
-
-        # Query with time range
-        response = audit_log_table.query(
-            KeyConditionExpression='tenantId = :tid AND #ts BETWEEN :start AND :end',
-            ExpressionAttributeNames={
-                '#ts': 'timestamp'  # timestamp is a reserved word
-            },
-            ExpressionAttributeValues={
-                ':tid': tenant_id,
-                ':start': start_time,
-                ':end': end_time + 'Z'  # Ensure we capture all timestamps
-            },
-            ScanIndexForward=False,  # Newest first
-            Limit=limit
-        )
-
-        logs = response.get('Items', [])
-        print(f"✅ Retrieved {len(logs)} audit logs for tenant {tenant_id}")
+        now = datetime.now(timezone.utc)
+        start = _to_utc(start_time) if start_time else now - timedelta(hours=24)
+        end = _to_utc(end_time) if end_time else now
+
+        # Same format as the stored timestamps, so they compare as strings
+        start_time = start.isoformat()
+        end_key = end.isoformat() + 'Z'  # Ensure we capture all timestamps
+
+        first_day = start.date()
+        last_day = end.date()
+        day_count = (last_day - first_day).days + 1
+        index_covers_range = _AUDIT_DAY_INDEX_SINCE is not None and start >= _AUDIT_DAY_INDEX_SINCE
+
+        if index_covers_range and 0 < day_count <= _AUDIT_MAX_FANOUT_DAYS:
+            # One query per day, newest day first. Each returns at most
+            # `limit` items, so merging and trimming gives the overall top N.
+            days = [last_day - timedelta(days=i) for i in range(day_count)]
+            if len(days) == 1:
+                per_day = [_query_audit_day(tenant_id, days[0], start_time, end_key, limit)]
+            else:
+                with ThreadPoolExecutor(max_workers=min(_AUDIT_QUERY_WORKERS, len(days))) as pool:
+                    per_day = list(pool.map(
+                        lambda day: _query_audit_day(tenant_id, day, start_time, end_key, limit),
+                        days
+                    ))
+            logs = [log for day_logs in per_day for log in day_logs]
+            logs.sort(key=lambda log: log['timestamp'], reverse=True)
+            logs = logs[:limit]
+        else:
+            # Query with time range
+            response = _audit_log_table().query(
+                KeyConditionExpression='tenantId = :tid AND #ts BETWEEN :start AND :end',
+                ExpressionAttributeNames={
+                    '#ts': 'timestamp'  # timestamp is a reserved word
+                },
+                ExpressionAttributeValues={
+                    ':tid': tenant_id,
+                    ':start': start_time,
+                    ':end': end_key
+                },
+                ScanIndexForward=False,  # Newest first
+                Limit=limit
+            )
+            logs = response.get('Items', [])
+
+        print(f"[OK] Retrieved {len(logs)} audit logs for tenant {tenant_id}")
         return logs
 
     except Exception as e:
-        print(f"❌ Error querying audit logs: {str(e)}")
+        print(f"[ERR] Error querying audit logs: {str(e)}")
         return []
 
 
@@ -410,6 +1027,51 @@ def query_audit_logs(
 # ENHANCED STATE FUNCTIONS WITH AUDIT LOGGING
 # ============================================
 
+# Inside audit_request_scope(): how many times each (tenant, agent, user)
+# read has happened in this request. None outside a scope.
+_audit_seen: ContextVar[Optional[Dict[Tuple[str, str, Optional[str]], int]]] = ContextVar(
+    'audit_seen', default=None
+)
+
+
+@contextmanager
+def audit_request_scope():
+    """
+    Log repeated state reads only once per request.
+    
+    Agents often read the same state several times while handling one
+    request. Inside this scope get_state_with_audit() writes a READ entry
+    for the first read only; when the scope ends, each read that repeated
+    gets one more entry with the total count. The access is still on
+    record, with far fewer audit writes.
+    
+    Example:
+        def lambda_handler(event, context):
+            with audit_request_scope():
+                state = get_state_with_audit("acme", "TaskSmith")
+                ...
+    """
+    token = _audit_seen.set({})
+    try:
+        yield
+    finally:
+        seen = _audit_seen.get()
+        _audit_seen.reset(token)
+        
+        for (tenant_id, agent_name, user_id), count in seen.items():
+            if count > 1:
+                log_audit_event(
+                    tenant_id=tenant_id,
+                    action='READ',
+                    agent_name=agent_name,
+                    resource_type='agent_state',
+                    resource_keys={'agentName': agent_name},
+                    user_id=user_id,
+                    reason='Repeated reads within one request',
+                    additional_data={'dedup_scope': 'request', 'read_count': count}
+                )
+
+
 def save_state_with_audit(
     tenant_id: str,
     agent_name: str,
@@ -433,14 +1095,14 @@ def save_state_with_audit(
     Returns:
         True if both save and audit log succeed
     """
-    # First, save the state
-    save_success = save_state(tenant_id, agent_name, data)
+    # First, save the state (the write itself tells us if it was an update)
+    save_success, existed = _put_state(tenant_id, agent_name, data, return_old=True)
 
     if save_success:
         # Log the audit event
         log_audit_event(
             tenant_id=tenant_id,
-            action='UPDATE' if get_state(tenant_id, agent_name) else 'CREATE',
+            action='UPDATE' if existed else 'CREATE',
             agent_name=agent_name,
             resource_type='agent_state',
             resource_keys={'agentName': agent_name},
@@ -475,6 +1137,17 @@ def get_state_with_audit(
     """
     # Get the state
     state = get_state(tenant_id, agent_name)
+    additional_data = {'found': state is not None}
+
+    # Inside audit_request_scope(), only the first identical read is logged
+    # here - the scope logs the total count when it ends
+    seen = _audit_seen.get()
+    if seen is not None:
+        key = (tenant_id, agent_name, user_id)
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] > 1:
+            return state
+        additional_data['dedup_scope'] = 'request'
 
     # Log the access (even if not found - attempted access is logged)
     log_audit_event(
@@ -485,7 +1158,7 @@ def get_state_with_audit(
         resource_keys={'agentName': agent_name},
         user_id=user_id,
         reason=reason,
-        additional_data={'found': state is not None}
+        additional_data=additional_data
     )
 
     return state
@@ -543,13 +1216,13 @@ if __name__ == '__main__':
         "test_key": "test_value",
         "count": 42
     })
-    print(f"Save test: {'✅' if success else '❌'}")
+    print(f"Save test: {'[OK]' if success else '[ERR]'}")
     
     # Test get
     state = get_state("test-tenant", "TestAgent")
-    print(f"Get test: {'✅' if state else '❌'}")
+    print(f"Get test: {'[OK]' if state else '[ERR]'}")
     print(f"Retrieved data: {state}")
     
     # Test delete
     success = delete_state("test-tenant", "TestAgent")
-    print(f"Delete test: {'✅' if success else '❌'}")
\ No newline at end of file
+    print(f"Delete test: {'[OK]' if success else '[ERR]'}")
\ No newline at end of file
@@ -12,13 +12,219 @@ What it provides:
 - log_info() - Normal operations
 - log_warning() - Potential issues
 - log_error() - Actual errors
+- Logger class (optionally buffers info logs until an error happens)
+- flush_logs() - Wait until every queued log line has been written
 - All automatically include: timestamp, agent name, tenant
+
+Log entries are handed to a background writer thread, so the calling code
+never waits on JSON encoding or stdout. Call flush_logs() before a Lambda
+handler returns - once it returns, AWS may freeze the container with
+unwritten lines still in the queue.
 """
 
+import atexit
 import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 
+# orjson is a C-accelerated JSON library that encodes straight to bytes.
+# Fall back to stdlib json if it's not installed (e.g. running locally).
+# Logged data often comes straight from DynamoDB, so non-string keys and
+# types JSON has no name for (Decimal, datetime, ...) are written as str().
+try:
+    import orjson
+    
+    def _dumpb(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def _dumpb(obj: Any) -> bytes:
+        return json.dumps(obj, default=str, separators=(',', ':')).encode()
+
+# Numeric log levels (same values as Python's logging module)
+_LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+# Messages below LOG_LEVEL (default INFO) are dropped before any work is
+# done - no dict, no timestamp, no JSON. Read once at import.
+_MIN_LEVEL = _LEVELS.get(os.environ.get('LOG_LEVEL', 'INFO').upper(), _LEVELS['INFO'])
+
+
+# ============================================
+# BACKGROUND WRITER
+# ============================================
+# Entries waiting to be written. When full, the oldest entry is dropped -
+# logging must never block (or crash) the request it's describing.
+_QUEUE_MAX = 10000
+_log_queue: queue.Queue = queue.Queue(maxsize=_QUEUE_MAX)
+
+# The writer writes a batch once it has this many entries, or once this
+# much time has passed since the first entry of the batch arrived
+_BATCH_MAX = 1000
+_BATCH_WAIT_SECONDS = 0.2
+
+# Put on the queue by flush_logs() so the writer stops waiting and writes now
+_FLUSH = object()
+
+_writer_thread: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def _serialize(entry: Dict[str, Any]) -> bytes:
+    """
+    One entry as a JSON line.
+    
+    An entry that can't be encoded (e.g. a value JSON has no type for) is
+    written with repr() of its non-string values instead - it still shows
+    up, and it can't take the rest of the batch down with it.
+    """
+    try:
+        return _dumpb(entry)
+    except Exception:
+        fallback = {
+            key: value if isinstance(value, str) else repr(value)
+            for key, value in entry.items()
+        }
+        # stdlib json escapes anything orjson might still reject (e.g. lone surrogates)
+        return json.dumps(fallback, separators=(',', ':')).encode()
+
+
+def _write_batch(batch):
+    """Serialize a batch of entries and write them to stdout in one call."""
+    lines = [_serialize(entry) for entry in batch if entry is not _FLUSH]
+    
+    if not lines:
+        return
+    
+    # One JSON object per line - CloudWatch turns each line into a log event
+    data = b'\n'.join(lines) + b'\n'
+    
+    # Anything print()ed earlier goes out first
+    sys.stdout.flush()
+    
+    # Write the bytes straight to the underlying binary stream - no
+    # bytes -> str -> bytes round trip through the text layer
+    out = getattr(sys.stdout, 'buffer', None)
+    if out is None:
+        sys.stdout.write(data.decode())
+        sys.stdout.flush()
+    else:
+        out.write(data)
+        out.flush()
+
+
+def _writer_loop():
+    """Runs forever in the writer thread: collect a batch, write it, repeat."""
+    while True:
+        batch = [_log_queue.get()]
+        deadline = time.monotonic() + _BATCH_WAIT_SECONDS
+        
+        while len(batch) < _BATCH_MAX and batch[-1] is not _FLUSH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_log_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        try:
+            _write_batch(batch)
+        except Exception:
+            # stdout itself failed - nowhere left to report it, drop the batch
+            pass
+        finally:
+            for _ in batch:
+                _log_queue.task_done()
+
+
+def _start_writer():
+    """Start the writer thread (once per process)."""
+    global _writer_thread
+    
+    with _writer_lock:
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(target=_writer_loop, name='log-writer', daemon=True)
+            _writer_thread.start()
+
+
+def _emit(log_entry: Dict[str, Any]):
+    """
+    Queue a log entry for the writer thread.
+    
+    The entry is serialized later, on the writer thread - don't modify the
+    `data` dict you logged afterwards.
+    """
+    if _writer_thread is None:
+        _start_writer()
+    
+    while True:
+        try:
+            _log_queue.put_nowait(log_entry)
+            return
+        except queue.Full:
+            # Drop the oldest entry to make room
+            try:
+                _log_queue.get_nowait()
+                _log_queue.task_done()
+            except queue.Empty:
+                pass
+
+
+def flush_logs():
+    """
+    Block until every queued log entry has been written.
+    
+    Call this at the end of each Lambda invocation (e.g. in a `finally:`),
+    because AWS freezes the container as soon as the handler returns.
+    
+    Example:
+        def lambda_handler(event, context):
+            try:
+                ...
+            finally:
+                flush_logs()
+    """
+    if _writer_thread is None:
+        return
+    
+    try:
+        _log_queue.put_nowait(_FLUSH)
+    except queue.Full:
+        pass  # the writer is busy anyway - it won't sit waiting for more
+    
+    _log_queue.join()
+
+
+# Write whatever is left when the process exits
+atexit.register(flush_logs)
+
+
+# ============================================
+# TIMESTAMPS
+# ============================================
+# Formatting a timestamp costs more than the rest of a log call put
+# together. Log lines only need second precision, so format once per
+# second and reuse the string. Stored as one tuple so a thread never sees
+# a new second paired with an old string.
+_ts_cache = (0, '')
+
+
+def _now_iso() -> str:
+    """Current UTC time as ISO 8601, to the second (e.g. 2025-01-15T10:00:00+00:00)."""
+    global _ts_cache
+    second = int(time.time())
+    cached_second, cached_text = _ts_cache
+    if second != cached_second:
+        cached_text = datetime.fromtimestamp(second, timezone.utc).isoformat()
+        _ts_cache = (second, cached_text)
+    return cached_text
+
 
 # ============================================
 # LOG FUNCTIONS
@@ -55,8 +261,11 @@ def log_info(agent_name: str, tenant_id: str, message: str, data: Optional[Dict[
         - Can query: fields @timestamp, message | filter agent="TaskSmith"
         - Can aggregate: stats count() by tenant
     """
+    if _MIN_LEVEL > 20:  # INFO filtered out by LOG_LEVEL
+        return
+    
     log_entry = {
-        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'timestamp': _now_iso(),
         'level': 'INFO',
         'agent': agent_name,
         'tenant': tenant_id,
@@ -67,8 +276,8 @@ def log_info(agent_name: str, tenant_id: str, message: str, data: Optional[Dict[
     if data:
         log_entry['data'] = data
     
-    # Print as JSON (CloudWatch captures stdout)
-    print(json.dumps(log_entry))
+    # Queue for the writer thread, which prints it as JSON (CloudWatch captures stdout)
+    _emit(log_entry)
 
 
 def log_warning(agent_name: str, tenant_id: str, message: str, data: Optional[Dict[str, Any]] = None):
@@ -82,8 +291,11 @@ def log_warning(agent_name: str, tenant_id: str, message: str, data: Optional[Di
             "sla_limit": 7
         })
     """
+    if _MIN_LEVEL > 30:  # WARNING filtered out by LOG_LEVEL
+        return
+    
     log_entry = {
-        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'timestamp': _now_iso(),
         'level': 'WARNING',
         'agent': agent_name,
         'tenant': tenant_id,
@@ -93,7 +305,7 @@ def log_warning(agent_name: str, tenant_id: str, message: str, data: Optional[Di
     if data:
         log_entry['data'] = data
     
-    print(json.dumps(log_entry))
+    _emit(log_entry)
 
 
 def log_error(agent_name: str, tenant_id: str, message: str, error: Optional[Exception] = None, data: Optional[Dict[str, Any]] = None):
@@ -115,8 +327,11 @@ def log_error(agent_name: str, tenant_id: str, message: str, error: Optional[Exc
                 "epic_key": "HC-100"
             })
     """
+    if _MIN_LEVEL > 40:  # ERROR filtered out by LOG_LEVEL
+        return
+    
     log_entry = {
-        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'timestamp': _now_iso(),
         'level': 'ERROR',
         'agent': agent_name,
         'tenant': tenant_id,
@@ -133,12 +348,56 @@ def log_error(agent_name: str, tenant_id: str, message: str, error: Optional[Exc
     if data:
         log_entry['data'] = data
     
-    print(json.dumps(log_entry))
+    _emit(log_entry)
+
+
+def _print_entry(timestamp: str, level: str, agent_name: str, tenant_id: str, message: str, data: Optional[Dict[str, Any]] = None):
+    """Write a log entry that was buffered earlier, keeping its original timestamp."""
+    log_entry = {
+        'timestamp': timestamp,
+        'level': level,
+        'agent': agent_name,
+        'tenant': tenant_id,
+        'message': message
+    }
+    
+    if data:
+        log_entry['data'] = data
+    
+    _emit(log_entry)
+
+
+# ============================================
+# LOG BUFFERING (Optional)
+# ============================================
+@dataclass(frozen=True)
+class LoggerBufferConfig:
+    """
+    Settings for Logger's in-memory ring buffer.
+    
+    With buffering on, INFO messages are kept in memory instead of being
+    printed. If the invocation hits an error, the buffer is printed first
+    (so you still see everything that led up to it). On the happy path
+    nothing is written - less JSON serialization and lower CloudWatch cost.
+    
+    Warnings and errors are always printed immediately.
+    
+    Attributes:
+        max_size: Maximum buffered entries (oldest are dropped when full)
+        minimum_log_level: Messages below this level are discarded entirely
+        flush_on_error: Print the buffer when log.error() is called
+    """
+    max_size: int = 10240
+    minimum_log_level: str = 'INFO'
+    flush_on_error: bool = True
 
 
 # ============================================
 # CLASS-BASED LOGGER (Optional, Cleaner)
 # ============================================
+# slots: no per-instance __dict__, so attribute reads on every log call are
+# a fixed-offset lookup. frozen: agent/tenant can't change mid-request.
+@dataclass(slots=True, frozen=True)
 class Logger:
     """
     Class-based logger - set agent and tenant once, use everywhere.
@@ -155,24 +414,52 @@ class Logger:
         log.info("Starting epic decomposition", {"epic_key": "HC-100"})
         log.warning("Epic has no description")
         log.error("Failed to call Jira API", error=e)
+    
+    Buffered logging:
+        log = Logger("TaskSmith", "acme-health", buffer_config=LoggerBufferConfig())
+        
+        log.info("Step 1")   # kept in memory
+        log.info("Step 2")   # kept in memory
+        log.error("Boom")    # prints Step 1, Step 2, then Boom
     """
+    agent_name: str
+    tenant_id: str
+    buffer_config: Optional[LoggerBufferConfig] = None
     
-    def __init__(self, agent_name: str, tenant_id: str):
-        """Initialize logger with agent and tenant."""
-        self.agent_name = agent_name
-        self.tenant_id = tenant_id
+    # Ring buffer of (timestamp, level, message, data) tuples
+    # None = buffering off, print everything immediately
+    _buffer: Optional[deque] = field(default=None, init=False, repr=False, compare=False)
     
-    def info(self, message: str, data: Optional[Dict[str, Any]] = None):
+    def __post_init__(self):
+        """Create the ring buffer if buffering is on (frozen, so via object.__setattr__)."""
+        if self.buffer_config:
+            object.__setattr__(self, '_buffer', deque(maxlen=self.buffer_config.max_size))
+    
+    # _log/_warn/_err default args make the module functions fast locals
+    # instead of a global lookup on every call
+    
+    def info(self, message: str, data: Optional[Dict[str, Any]] = None, _log=log_info):
         """Log info message."""
-        log_info(self.agent_name, self.tenant_id, message, data)
+        if self._buffer is None:
+            _log(self.agent_name, self.tenant_id, message, data)
+        elif _MIN_LEVEL <= 20 and _LEVELS['INFO'] >= _LEVELS.get(self.buffer_config.minimum_log_level, _LEVELS['INFO']):
+            self._buffer.append((_now_iso(), 'INFO', message, data))
     
-    def warning(self, message: str, data: Optional[Dict[str, Any]] = None):
+    def warning(self, message: str, data: Optional[Dict[str, Any]] = None, _warn=log_warning):
         """Log warning message."""
-        log_warning(self.agent_name, self.tenant_id, message, data)
+        _warn(self.agent_name, self.tenant_id, message, data)
+    
+    def error(self, message: str, error: Optional[Exception] = None, data: Optional[Dict[str, Any]] = None, _err=log_error):
+        """Log error message (printing any buffered messages first)."""
+        if self._buffer is not None and self.buffer_config.flush_on_error:
+            self.flush_buffer()
+        _err(self.agent_name, self.tenant_id, message, error, data)
     
-    def error(self, message: str, error: Optional[Exception] = None, data: Optional[Dict[str, Any]] = None):
-        """Log error message."""
-        log_error(self.agent_name, self.tenant_id, message, error, data)
+    def flush_buffer(self):
+        """Print all buffered messages (oldest first) and empty the buffer."""
+        while self._buffer:
+            timestamp, level, message, data = self._buffer.popleft()
+            _print_entry(timestamp, level, self.agent_name, self.tenant_id, message, data)
 
 
 # ============================================
@@ -219,6 +506,8 @@ if __name__ == '__main__':
     except Exception as e:
         log_error("TestAgent", "test-tenant", "Test error occurred", error=e)
     
+    # Logs are written by a background thread - wait for them before printing more
+    flush_logs()
     print()
     print("Testing class-based logger...")
     print()
@@ -227,4 +516,17 @@ if __name__ == '__main__':
     log = Logger("TestAgent", "test-tenant")
     log.info("Class-based info")
     log.warning("Class-based warning")
-    log.error("Class-based error")
\ No newline at end of file
+    log.error("Class-based error")
+    
+    flush_logs()
+    print()
+    print("Testing buffered logger...")
+    print()
+    
+    # Info messages stay in memory until an error happens
+    log = Logger("TestAgent", "test-tenant", buffer_config=LoggerBufferConfig())
+    log.info("Buffered info 1")
+    log.info("Buffered info 2")
+    log.error("Buffered error (prints the two infos first)")
+    
+    flush_logs()
\ No newline at end of file
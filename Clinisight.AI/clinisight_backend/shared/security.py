@@ -24,8 +24,13 @@ What we DON'T store:
 This file provides functions to sanitize data before logging or storing.
 """
 
+import functools
 import re
-from typing import Dict, Any, List, Optional
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Dict, Any, Iterator, List, Optional
 from dataclasses import dataclass, field
 
 # ============================================
@@ -51,17 +56,63 @@ SENSITIVE_FIELDS = [
     'auth', 'authorization', 'access_token', 'refresh_token',
 ]
 
+# All of the above as one case-insensitive regex - a single C-level scan per
+# key instead of ~40 Python substring checks
+_SENSITIVE_RE = re.compile('|'.join(re.escape(word) for word in SENSITIVE_FIELDS), re.IGNORECASE)
+
+# If pyahocorasick is installed, use an Aho-Corasick automaton instead: it
+# finds all the words in one pass over the key, however many words there are.
+try:
+    import ahocorasick
+    
+    _SENSITIVE_AC = ahocorasick.Automaton()
+    for _word in SENSITIVE_FIELDS:
+        _SENSITIVE_AC.add_word(_word.lower(), _word)
+    _SENSITIVE_AC.make_automaton()
+    
+    def _contains_sensitive_word(key_lower: str) -> bool:
+        return next(_SENSITIVE_AC.iter(key_lower), None) is not None
+    
+except ImportError:
+    def _contains_sensitive_word(key_lower: str) -> bool:
+        return _SENSITIVE_RE.search(key_lower) is not None
+
+# Most sensitive keys are plain structured names (patient_name, member.id),
+# where one of the parts *is* a sensitive word - a set lookup per part
+# answers those without a scan. Anything else (camelCase, words run
+# together, the multi-part words like api_key) still gets the full
+# substring check, so the result is the same either way.
+_SENSITIVE_TOKENS = frozenset(word.lower() for word in SENSITIVE_FIELDS)
+_KEY_SEPARATOR_RE = re.compile(r'[_.\-\s]')
+
+
+# The answer is cached per key - payloads repeat the same few field names
+# over and over, so most checks become a dict lookup.
+@functools.lru_cache(maxsize=4096)
+def _is_sensitive_key(key: str) -> bool:
+    """True if the field name contains any SENSITIVE_FIELDS word."""
+    # Lowercased once for both checks - and not at all for the usual
+    # already-lowercase ASCII key
+    key_lower = key if key.isascii() and key.islower() else key.lower()
+    if not _SENSITIVE_TOKENS.isdisjoint(_KEY_SEPARATOR_RE.split(key_lower)):
+        return True
+    return _contains_sensitive_word(key_lower)
+
 
 # ============================================
 # HEALTHCARE PII REGEX PATTERNS
 # ============================================
 # Patterns to detect PII/PHI in free text (not just field names)
 
+# Possessive quantifiers (++, ?+, *+) never give characters back. They're
+# used only where giving back could never lead to a match anyway (e.g. digits
+# followed by a separator or \b), so results are the same but a failed
+# attempt gives up immediately instead of backtracking.
 HEALTHCARE_PII_PATTERNS = {
     # Social Security Number (SSN)
     # Formats: 123-45-6789, 123 45 6789, 123456789
     'ssn': {
-        'pattern': r'\b\d{3}[-\s]?\d{2}[-\s]?\d{4}\b',
+        'pattern': r'\b\d{3}[-\s]?+\d{2}[-\s]?+\d{4}\b',
         'description': 'Social Security Number',
         'severity': 'critical'
     },
@@ -69,7 +120,7 @@ HEALTHCARE_PII_PATTERNS = {
     # Medical Record Number (MRN)
     # Common formats: MRN-12345678, MRN: 12345678, MRN12345678
     'mrn': {
-        'pattern': r'\b(?:MRN[-:\s]?\d{6,10}|\d{6,10}[-\s]?MRN)\b',
+        'pattern': r'\b(?:MRN[-:\s]?+\d{6,10}+|\d{6,10}+[-\s]?+MRN)\b',
         'description': 'Medical Record Number',
         'severity': 'critical'
     },
@@ -77,7 +128,7 @@ HEALTHCARE_PII_PATTERNS = {
     # Date of Birth
     # Formats: 01/15/1990, 1990-01-15, Jan 15, 1990
     'dob': {
-        'pattern': r'\b(?:\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}[/-]\d{1,2}[/-]\d{1,2}|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{4})\b',
+        'pattern': r'\b(?:\d{1,2}+[/-]\d{1,2}+[/-]\d{2,4}+|\d{4}[/-]\d{1,2}+[/-]\d{1,2}+|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*+\s++\d{1,2}+,?+\s++\d{4})\b',
         'description': 'Date of Birth',
         'severity': 'high'
     },
@@ -85,14 +136,17 @@ HEALTHCARE_PII_PATTERNS = {
     # Phone Numbers
     # Formats: (555) 123-4567, 555-123-4567, 5551234567
     'phone': {
-        'pattern': r'\b(?:\(\d{3}\)\s*|\d{3}[-.\s]?)\d{3}[-.\s]?\d{4}\b',
+        'pattern': r'\b(?:\(\d{3}\)\s*+|\d{3}[-.\s]?+)\d{3}[-.\s]?+\d{4}\b',
         'description': 'Phone Number',
         'severity': 'high'
     },
 
     # Email Addresses
+    # Starts only where a run of local-part characters starts (lookbehind
+    # instead of \b): from a \b inside a run like "a.a.a.a..." the whole
+    # rest of the run would be read again - quadratic on long runs
     'email': {
-        'pattern': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+        'pattern': r'(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]++@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
         'description': 'Email Address',
         'severity': 'high'
     },
@@ -100,15 +154,16 @@ HEALTHCARE_PII_PATTERNS = {
     # Insurance/Member ID
     # Common formats: Various alphanumeric patterns
     'insurance_id': {
-        'pattern': r'\b(?:INS|MEM|POL|GRP)[-\s]?\d{8,12}\b',
+        'pattern': r'\b(?:INS|MEM|POL|GRP)[-\s]?+\d{8,12}+\b',
         'description': 'Insurance/Member ID',
         'severity': 'high'
     },
 
     # National Provider Identifier (NPI)
-    # 10-digit number
+    # Format: NPI 1234567890 - the prefix is required, a bare 10-digit
+    # number is indistinguishable from a phone number (and reported as one)
     'npi': {
-        'pattern': r'\b(?:NPI[-:\s]?)?\d{10}\b',
+        'pattern': r'\bNPI[-:\s]?+\d{10}\b',
         'description': 'National Provider Identifier',
         'severity': 'medium'
     },
@@ -122,9 +177,9 @@ HEALTHCARE_PII_PATTERNS = {
     },
 
     # Credit Card Numbers
-    # 13-19 digits, may have spaces/dashes
+    # 13-20 digits in groups of 4, may have spaces/dashes
     'credit_card': {
-        'pattern': r'\b(?:\d{4}[-\s]?){3,4}\d{1,4}\b',
+        'pattern': r'\b\d{4}(?:[-\s]?+\d{4}){2,3}[-\s]?+\d{1,4}+\b',
         'description': 'Credit Card Number',
         'severity': 'critical'
     },
@@ -132,7 +187,7 @@ HEALTHCARE_PII_PATTERNS = {
     # ICD-10 Diagnosis Codes
     # Format: Letter + 2 digits + optional decimal + up to 4 more characters
     'icd10': {
-        'pattern': r'\b[A-Z]\d{2}(?:\.\d{1,4})?\b',
+        'pattern': r'\b[A-Z]\d{2}(?:\.\d{1,4}+)?\b',
         'description': 'ICD-10 Diagnosis Code',
         'severity': 'medium'
     },
@@ -148,17 +203,264 @@ HEALTHCARE_PII_PATTERNS = {
     # NDC (National Drug Code)
     # Format: 5-4-2, 5-4-1, 5-3-2, 4-4-2
     'ndc': {
-        'pattern': r'\b\d{4,5}[-]\d{3,4}[-]\d{1,2}\b',
+        'pattern': r'\b\d{4,5}+[-]\d{3,4}+[-]\d{1,2}+\b',
         'description': 'National Drug Code',
         'severity': 'medium'
     },
 }
 
+# The third-party `regex` engine, if installed, can release the GIL while
+# it scans (concurrent=True), so other threads keep running. Otherwise the
+# stdlib re is used (Python 3.11+ understands possessive quantifiers too).
+try:
+    import regex as _pii_re
+    _SCAN_KWARGS = {'concurrent': True}
+except ImportError:
+    _pii_re = re
+    _SCAN_KWARGS = {}
+
+# Compiled once at import time: name -> (compiled pattern, pattern info).
+# Patterns that are missing or don't compile are left out (same as the
+# scanner skipping them before).
+_COMPILED_PII = {}
+for _name, _info in HEALTHCARE_PII_PATTERNS.items():
+    if not _info.get('pattern'):
+        continue
+    try:
+        _COMPILED_PII[_name] = (_pii_re.compile(_info['pattern'], _pii_re.IGNORECASE), _info)
+    except _pii_re.error:
+        continue
+
+# All of them as one alternation of named groups, so a scan is a single
+# pass over the text. The patterns only use (?:...) groups, so group k+1
+# is pattern k and match.lastindex - 1 says which pattern matched.
+# Where patterns overlap, each piece of text counts once, for the first
+# alternative that matches there - so prefixed IDs (MRN-, INS-) and the
+# longer formats go first, e.g. an NDC code 12345-6789-01 must not be
+# claimed by the 5-digit CPT pattern.
+_UNION_ORDER = (
+    'mrn', 'insurance_id', 'dea',
+    'credit_card', 'ndc', 'dob', 'ssn', 'phone', 'npi', 'email',
+    'icd10', 'cpt',
+)
+# Pattern metadata as parallel tuples in union (group) order, so a match
+# finds its name/description/severity by index instead of dict lookups
+_PII_NAMES = tuple(sorted(
+    _COMPILED_PII,
+    key=lambda n: _UNION_ORDER.index(n) if n in _UNION_ORDER else len(_UNION_ORDER)
+))
+_PII_DESCRIPTIONS = tuple(_COMPILED_PII[n][1].get('description', 'Unknown') for n in _PII_NAMES)
+_PII_SEVERITIES = tuple(_COMPILED_PII[n][1].get('severity', 'medium') for n in _PII_NAMES)
+_PII_CRITICAL = tuple(severity == 'critical' for severity in _PII_SEVERITIES)
+_PII_MASKS = tuple(f'[MASKED-{name.upper()}]' for name in _PII_NAMES)
+
+# Indexes into the tuples above in HEALTHCARE_PII_PATTERNS order - results
+# are reported in that order
+_PII_REPORT_ORDER = tuple(_PII_NAMES.index(n) for n in _COMPILED_PII)
+
+_UNION_PII_RE = _pii_re.compile(
+    '|'.join(f"(?P<{name}>{_COMPILED_PII[name][1]['pattern']})" for name in _PII_NAMES),
+    _pii_re.IGNORECASE
+)
+if _UNION_PII_RE.groups != len(_PII_NAMES):
+    raise ValueError("HEALTHCARE_PII_PATTERNS must use non-capturing (?:...) groups only")
+
+# The `regex` engine keeps match buffers on the pattern object for reuse.
+# Threads scanning at once (concurrent=True, chunked scans) keep taking
+# them from each other and allocate new ones, so each thread gets its own
+# copy of the union pattern. The stdlib re keeps no state on the pattern
+# (and re.compile would return the cached object anyway) - it's shared.
+_union_local = threading.local()
+
+
+def _union_re():
+    """The union PII pattern for the current thread."""
+    if _pii_re is re:
+        return _UNION_PII_RE
+    union = getattr(_union_local, 'union', None)
+    if union is None:
+        # cache_pattern=False: a fresh object, not regex's cached one
+        union = _pii_re.compile(_UNION_PII_RE.pattern, _UNION_PII_RE.flags, cache_pattern=False)
+        _union_local.union = union
+    return union
+
+# Optional Hyperscan prefilter: all patterns in one SIMD-accelerated
+# database that answers "does anything match at all?". Most text has no
+# PII, and then the regex scan is skipped entirely. When something does
+# match, the union regex above still does the counting, so results are
+# the same with or without Hyperscan.
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+def _hyperscan_pattern(pattern: str) -> str:
+    """
+    A pattern Hyperscan can compile that matches wherever `pattern` does.
+    
+    Hyperscan has no possessive quantifiers - ++, ?+, *+, {m,n}+ become
+    plain ones - and no lookbehind, which is dropped (a looser prefilter
+    is fine, it only has to never miss).
+    """
+    pattern = re.sub(r'\(\?<[!=][^)]*\)', '', pattern)
+    return re.sub(r'([+*?}])\+', r'\1', pattern)
+
+
+_HS_DB = None
+if hyperscan is not None:
+    try:
+        _hs_db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        _hs_db.compile(
+            expressions=[_hyperscan_pattern(info['pattern']).encode() for _, info in _COMPILED_PII.values()],
+            ids=list(range(len(_COMPILED_PII))),
+            # Unicode-aware \d and \b like Python's re; report each pattern once
+            flags=[
+                hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_UTF8
+                | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SINGLEMATCH
+            ] * len(_COMPILED_PII)
+        )
+        _HS_DB = _hs_db
+    except hyperscan.error as e:
+        # Pattern Hyperscan can't compile - just scan without the prefilter
+        print(f"[WARN] Hyperscan prefilter disabled: {e}")
+        _HS_DB = None
+
+# Hyperscan scratch space can't be shared between threads
+_hs_local = threading.local()
+
+# Every PII pattern needs at least one digit, except email which needs an
+# '@'. Text with neither can't match anything - and one C-level search for
+# a single character is far cheaper than any pattern scan.
+_PII_ANCHOR_RE = re.compile(r'[\d@]')
+
+# ASCII-only text (most of it) takes a faster route: bytes.translate deletes
+# every byte that isn't a digit or '@' in one tight C loop - if nothing is
+# left, there's nothing to scan. ~20x quicker than the regex search on
+# clean text. Non-ASCII text keeps the regex (Unicode digits count too).
+_NON_ANCHOR_BYTES = bytes(b for b in range(256) if b not in b'0123456789@')
+
+
+def _may_contain_pii(text: str) -> bool:
+    """
+    Quick check before the full scan: False means no PII pattern matches.
+    
+    Text with no digit and no '@' is ruled out straight away; the rest
+    goes through Hyperscan if it's installed (otherwise the full scan
+    decides).
+    """
+    if text.isascii():
+        if not text.encode('ascii').translate(None, _NON_ANCHOR_BYTES):
+            return False
+    elif _PII_ANCHOR_RE.search(text) is None:
+        return False
+    
+    if _HS_DB is None:
+        return True
+    
+    try:
+        data = text.encode('utf-8')
+    except UnicodeEncodeError:
+        return True
+    
+    scratch = getattr(_hs_local, 'scratch', None)
+    if scratch is None:
+        scratch = _hs_local.scratch = hyperscan.Scratch(_HS_DB)
+    
+    hits = []
+    _HS_DB.scan(data, match_event_handler=lambda *_: hits.append(True), scratch=scratch)
+    return bool(hits)
+
+
+# Big texts (bulk exports, log bundles) are scanned as 8KB chunks in
+# parallel threads. Only with the `regex` engine, which releases the GIL
+# while matching - with the stdlib re the threads would just take turns.
+# Each chunk reads 1KB past its end so a match crossing the boundary is
+# still seen whole, and keeps only matches that start inside it. If the
+# engine reports that a match attempt ran into the end of that window
+# (a `regex` partial match), the chunk is rescanned with a bigger one -
+# up to 4KB past its end. A chunk that needs more than that sits in a long
+# run of candidate text, where every chunk would end up rescanning to the
+# end of the text: the whole text then gets one ordinary single pass.
+_PARALLEL_SCAN_MIN = 16 * 1024
+_SCAN_CHUNK = 8 * 1024
+_SCAN_OVERLAP = 1024
+_SCAN_MAX_WINDOW = 4 * _SCAN_OVERLAP
+_SCAN_WORKERS = 4
+
+
+@functools.cache
+def _scan_pool() -> ThreadPoolExecutor:
+    """Thread pool for chunked scans (created on first big scan)."""
+    return ThreadPoolExecutor(max_workers=_SCAN_WORKERS, thread_name_prefix='pii-scan')
+
+
+def _chunk_matches(text: str, start: int, end: int) -> Optional[list]:
+    """
+    Union-regex matches that start in text[start:end], in order.
+    
+    Returns None if the window would have to grow past _SCAN_MAX_WINDOW.
+    """
+    window = _SCAN_OVERLAP
+    
+    while True:
+        endpos = min(end + window, len(text))
+        truncated = endpos < len(text)
+        found = []
+        
+        # pos/endpos instead of slicing: \b still sees the character before pos
+        for match in _union_re().finditer(text, start, endpos, partial=truncated, **_SCAN_KWARGS):
+            if match.start() >= end:
+                break
+            if truncated and (match.partial or match.end() == endpos):
+                # Might continue past the window - look further and redo
+                break
+            found.append(match)
+        else:
+            return found
+        
+        if match.start() >= end:
+            return found
+        if window >= _SCAN_MAX_WINDOW:
+            return None
+        window *= 2
+
+
+def _iter_pii_matches(text: str):
+    """
+    Union-regex matches in text, exactly as one finditer() pass finds them.
+    
+    Large texts are split into chunks and scanned in parallel when the
+    `regex` engine is available; the chunks are then stitched back
+    together in order. Falls back to a single pass when a chunk can't be
+    scanned within its window limit.
+    """
+    if _pii_re is re or len(text) < _PARALLEL_SCAN_MIN:
+        return _union_re().finditer(text, **_SCAN_KWARGS)
+    
+    starts = range(0, len(text), _SCAN_CHUNK)
+    chunks = list(_scan_pool().map(lambda start: _chunk_matches(text, start, start + _SCAN_CHUNK), starts))
+    
+    merged = []
+    previous_end = 0
+    for start, found in zip(starts, chunks):
+        if previous_end > start:
+            # The last match of the previous chunk reaches into this one.
+            # A single pass would carry on from where it ended, so do that.
+            found = _chunk_matches(text, previous_end, start + _SCAN_CHUNK)
+        if found is None:
+            return _union_re().finditer(text, **_SCAN_KWARGS)
+        if found:
+            merged.extend(found)
+            previous_end = found[-1].end()
+    return merged
+
 
 # ============================================
 # PII SCAN RESULT DATA CLASS
 # ============================================
-@dataclass
+# slots=True: fixed attribute layout instead of a __dict__ per result
+@dataclass(slots=True)
 class PIIScanResult:
     """
     Result of scanning data for PII/PHI.
@@ -181,12 +483,12 @@ class PIIScanResult:
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
         return {
-            'detected_patterns': self.detected_patterns if self.detected_patterns else [],
-            'sensitive_fields': self.sensitive_fields if self.sensitive_fields else [],
+            'detected_patterns': self.detected_patterns or [],
+            'sensitive_fields': self.sensitive_fields or [],
             'has_pii': self.has_pii,
             'risk_level': self.risk_level,
-            'scan_summary': self.scan_summary if self.scan_summary else 'N/A',
-            'recommendations': self.recommendations if self.recommendations else []
+            'scan_summary': self.scan_summary or 'N/A',
+            'recommendations': self.recommendations or []
         }
 
 
@@ -197,8 +499,9 @@ def sanitize_for_logging(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Remove or redact sensitive fields from data before logging.
     
-    This function recursively searches through dictionaries and
-    replaces sensitive values with "[REDACTED]".
+    This function searches through nested dictionaries and
+    replaces sensitive values with "[REDACTED]". If nothing needs
+    redacting, the original dictionary is returned as-is (no copy).
     
     Args:
         data: Dictionary that might contain sensitive data
@@ -234,44 +537,103 @@ def sanitize_for_logging(data: Dict[str, Any]) -> Dict[str, Any]:
     if not isinstance(data, dict):
         return data
     
+    # Pass 1: find which dicts/lists lead down to a sensitive key.
+    # Most payloads have none, and then we hand back the original untouched.
+    dirty = _dirty_containers(data)
+    if not dirty:
+        return data
+    
+    # Pass 2: copy only the dirty containers - clean sub-trees are shared
+    # with the original instead of being rebuilt key by key
     sanitized = {}
+    stack = deque([(data, sanitized)])
     
-    for key, value in data.items():
-        # Convert key to lowercase for case-insensitive matching
-        key_lower = key.lower()
-        
-        # Check if this key matches any sensitive field
-        is_sensitive = any(
-            sensitive_word in key_lower 
-            for sensitive_word in SENSITIVE_FIELDS
-        )
-        
-        if is_sensitive:
-            # Redact sensitive field
-            sanitized[key] = '[REDACTED]'
-        
-        elif isinstance(value, dict):
-            # Recursively sanitize nested dictionaries
-            sanitized[key] = sanitize_for_logging(value)
-        
-        elif isinstance(value, list):
-            # Sanitize lists of dictionaries
-            sanitized[key] = [
-                sanitize_for_logging(item) if isinstance(item, dict) else item
-                for item in value
-            ]
+    while stack:
+        source, target = stack.pop()
         
+        if isinstance(source, dict):
+            for key, value in source.items():
+                if _is_sensitive_key(key):
+                    # Redact sensitive field
+                    target[key] = '[REDACTED]'
+                elif id(value) in dirty:
+                    # Nested dict/list with something to redact further down
+                    target[key] = {} if isinstance(value, dict) else []
+                    stack.append((value, target[key]))
+                else:
+                    # Safe to include as-is
+                    target[key] = value
         else:
-            # Safe to include
-            sanitized[key] = value
+            # Lists: only dictionaries inside them get sanitized
+            for item in source:
+                if id(item) in dirty:
+                    copy = {}
+                    target.append(copy)
+                    stack.append((item, copy))
+                else:
+                    target.append(item)
     
     return sanitized
 
 
+def _dirty_containers(data: Dict[str, Any]) -> set:
+    """
+    Return the id()s of every dict/list on a path from `data` to a sensitive key.
+    
+    Walks with an explicit stack instead of recursion. Each container
+    remembers its parents, so when a sensitive key turns up we mark the
+    path back to the root (a dict shared by two parents marks both).
+    """
+    dirty = set()
+    parents = {id(data): []}
+    stack = deque([data])
+    
+    def mark(container_id: int):
+        marks = [container_id]
+        while marks:
+            current = marks.pop()
+            if current not in dirty:
+                dirty.add(current)
+                marks.extend(parents[current])
+    
+    while stack:
+        node = stack.pop()
+        
+        if isinstance(node, dict):
+            children = []
+            for key, value in node.items():
+                if _is_sensitive_key(key):
+                    mark(id(node))
+                elif isinstance(value, (dict, list)):
+                    children.append(value)
+        else:
+            children = [item for item in node if isinstance(item, dict)]
+        
+        for child in children:
+            if id(child) in parents:
+                # Already queued via another parent - record the extra edge,
+                # and if the child was already found dirty, so is this path
+                parents[id(child)].append(id(node))
+                if id(child) in dirty:
+                    mark(id(node))
+            else:
+                parents[id(child)] = [id(node)]
+                stack.append(child)
+    
+    return dirty
+
+
 # ============================================
 # VALIDATION FUNCTIONS
 # ============================================
 
+# Pattern: lowercase alphanumeric + hyphens, 3-50 chars
+# Compiled once at import time instead of on every call
+# \Z, not $ - $ also matches before a trailing newline ("acme\n")
+_TENANT_RE = re.compile(r'^[a-z0-9\-]{3,50}\Z')
+
+
+@functools.lru_cache(maxsize=4096)
 def validate_tenant_id(tenant_id: str) -> bool:
     """
     Validate tenant ID format to prevent injection attacks.
@@ -295,18 +657,16 @@ def validate_tenant_id(tenant_id: str) -> bool:
         validate_tenant_id("has spaces")       # ❌ Invalid (no spaces)
         validate_tenant_id("ab")               # ❌ Invalid (too short)
         validate_tenant_id("x" * 51)           # ❌ Invalid (too long)
+        validate_tenant_id("acme\n")           # ❌ Invalid (trailing newline)
     
     Why validate?
         Prevents SQL injection-like attacks in DynamoDB queries
         Ensures consistent naming across system
-    """
-    # Pattern: lowercase alphanumeric + hyphens, 3-50 chars
-    pattern = r'^[a-z0-9\-]{3,50}$'
     
-    if not re.match(pattern, tenant_id):
-        return False
-    
-    return True
+    Results are cached per tenant ID - warm Lambda containers see the
+    same few tenants on almost every request.
+    """
+    return _TENANT_RE.match(tenant_id) is not None
 
 
 def check_for_pii(data: Dict[str, Any]) -> List[str]:
@@ -339,38 +699,100 @@ def check_for_pii(data: Dict[str, Any]) -> List[str]:
     """
     warnings = []
     
-    def check_dict(d: Dict[str, Any], path: str = ""):
-        """Recursively check nested dictionaries."""
-        for key, value in d.items():
-            current_path = f"{path}.{key}" if path else key
-            key_lower = key.lower()
-            
-            # Check if key matches sensitive pattern
-            if any(sensitive in key_lower for sensitive in SENSITIVE_FIELDS):
-                warnings.append(
-                    f"Field '{current_path}' appears to contain PII/PHI"
-                )
-            
-            # Recursively check nested dicts
-            if isinstance(value, dict):
-                check_dict(value, current_path)
-            elif isinstance(value, list):
-                for i, item in enumerate(value):
-                    if isinstance(item, dict):
-                        check_dict(item, f"{current_path}[{i}]")
-    
-    check_dict(data)
+    # Explicit stack of (key, value, parent path) entries instead of
+    # recursion. Entries are pushed in reverse so they pop in document
+    # order, giving the same warning order as a depth-first walk. A field's
+    # full path is only built for a warning or a nested dict/list.
+    stack = deque()
+    
+    def push_entries(d: Dict[str, Any], prefix: str):
+        stack.extend(reversed([(key, value, prefix) for key, value in d.items()]))
+    
+    push_entries(data, "")
+    
+    while stack:
+        key, value, prefix = stack.pop()
+        sensitive_key = _is_sensitive_key(key)
+        if not sensitive_key and not isinstance(value, (dict, list)):
+            continue
+        current_path = f"{prefix}.{key}" if prefix else key
+        
+        # Check if key matches sensitive pattern
+        if sensitive_key:
+            warnings.append(
+                f"Field '{current_path}' appears to contain PII/PHI"
+            )
+        
+        # Queue up nested dicts (directly or inside lists)
+        if isinstance(value, dict):
+            push_entries(value, current_path)
+        elif isinstance(value, list):
+            for i in range(len(value) - 1, -1, -1):
+                if isinstance(value[i], dict):
+                    push_entries(value[i], f"{current_path}[{i}]")
+    
     return warnings
 
 
 # ============================================
 # COMPREHENSIVE PII SCANNER (HIPAA)
 # ============================================
+def _iter_strings(obj: Any, sensitive: Optional[List[str]] = None, path: str = "") -> Iterator[str]:
+    """
+    Yield every string value in a nested dict/list structure, lazily.
+    
+    If `sensitive` is given, the path of every sensitive field name met
+    on the way is appended to it (e.g. "assignee.email").
+    
+    Walks with an explicit stack instead of recursion, pushing children in
+    reverse so they pop in document order (same order as depth-first).
+    """
+    if sensitive is None:
+        # No field-name check, so no paths needed - just the values
+        stack = [obj]
+        while stack:
+            obj = stack.pop()
+            if isinstance(obj, str):
+                yield obj
+            elif isinstance(obj, dict):
+                stack.extend(reversed(obj.values()))
+            elif isinstance(obj, list):
+                stack.extend(reversed(obj))
+        return
+
+    # Entries are (value, path of its parent, key or list index, is dict key).
+    # A value's own path is only built when it's needed: for a sensitive
+    # field name, or as the parent path of a nested dict/list.
+    stack = [(obj, path, None, False)]
+    while stack:
+        obj, parent, key, is_key = stack.pop()
+        container = isinstance(obj, (dict, list))
+        if is_key:
+            # Check field names
+            sensitive_key = _is_sensitive_key(key)
+            if sensitive_key or container:
+                current_path = f"{parent}.{key}" if parent else key
+                if sensitive_key:
+                    sensitive.append(current_path)
+        elif key is None:
+            current_path = parent
+        elif container:
+            current_path = f"{parent}[{key}]"
+
+        if isinstance(obj, str):
+            yield obj
+        elif isinstance(obj, dict):
+            stack.extend(reversed([(value, current_path, k, True) for k, value in obj.items()]))
+        elif isinstance(obj, list):
+            stack.extend(reversed([(item, current_path, i, False) for i, item in enumerate(obj)]))
+
+
 def scan_for_healthcare_pii(
     data: Optional[Dict[str, Any]] = None,
     text: Optional[str] = None,
     check_patterns: bool = True,
-    check_fields: bool = True
+    check_fields: bool = True,
+    fast_exit: bool = False
 ) -> PIIScanResult:
     """
     Comprehensive PII/PHI scanner for healthcare data.
@@ -383,6 +805,8 @@ def scan_for_healthcare_pii(
         text: Free text to scan (optional)
         check_patterns: Whether to check regex patterns in values
         check_fields: Whether to check sensitive field names
+        fast_exit: Stop at the first critical pattern match - enough to
+            answer "is there PII?", but counts and fields may be partial
 
     Returns:
         PIIScanResult with all findings (empty/default if nothing found)
@@ -415,57 +839,52 @@ def scan_for_healthcare_pii(
         result.scan_summary = 'No data provided for scanning'
         return result
 
-    # Collect all text to scan
-    all_text_values = []
-
-    if text:
-        all_text_values.append(text)
-
-    if data:
-        # Extract all string values from dictionary
-        def extract_text(obj, path=""):
-            if isinstance(obj, str):
-                all_text_values.append(obj)
-            elif isinstance(obj, dict):
-                for key, value in obj.items():
-                    current_path = f"{path}.{key}" if path else key
-
-                    # Check field names
-                    if check_fields:
-                        key_lower = key.lower()
-                        if any(s in key_lower for s in SENSITIVE_FIELDS):
-                            sensitive.append(current_path)
-
-                    extract_text(value, current_path)
-            elif isinstance(obj, list):
-                for i, item in enumerate(obj):
-                    extract_text(item, f"{path}[{i}]")
-
-        extract_text(data)
+    # All text to scan, produced lazily - field names are checked as the
+    # walk goes (sensitive paths are collected into `sensitive`)
+    text_values = chain(
+        (text,) if text else (),
+        _iter_strings(data, sensitive if check_fields else None) if data else ()
+    )
 
     # Scan text values for PII patterns
-    if check_patterns and all_text_values:
-        combined_text = ' '.join(all_text_values)
-
-        for pattern_name, pattern_info in HEALTHCARE_PII_PATTERNS.items():
-            regex = pattern_info.get('pattern', '')
-            if not regex:
+    if check_patterns:
+        # One pass with the union regex over each value in place (no joined
+        # copy of the whole payload, and no matches bridging two values):
+        # count matches per pattern and keep the first match of each as the
+        # sample (indexed like _PII_NAMES)
+        counts = [0] * len(_PII_NAMES)
+        samples = [''] * len(_PII_NAMES)
+        stop = False
+        for value in text_values:
+            if not _may_contain_pii(value):
                 continue
-
-            try:
-                matches = re.findall(regex, combined_text, re.IGNORECASE)
-                if matches:
-                    detected.append({
-                        'type': pattern_name,
-                        'description': pattern_info.get('description', 'Unknown'),
-                        'severity': pattern_info.get('severity', 'medium'),
-                        'count': len(matches),
-                        'sample': matches[0][:20] + '...' if len(matches[0]) > 20 else matches[0]
-                    })
-                    severity_levels.append(pattern_info.get('severity', 'medium'))
-            except re.error:
-                # Invalid regex - skip this pattern
+            for match in _iter_pii_matches(value):
+                index = match.lastindex - 1
+                if not counts[index]:
+                    samples[index] = match.group()
+                counts[index] += 1
+                if fast_exit and _PII_CRITICAL[index]:
+                    stop = True
+                    break
+            if stop:
+                break
+
+        # Report in pattern order, like the per-pattern scan did
+        for index in _PII_REPORT_ORDER:
+            if not counts[index]:
                 continue
+            sample = samples[index]
+            detected.append({
+                'type': _PII_NAMES[index],
+                'description': _PII_DESCRIPTIONS[index],
+                'severity': _PII_SEVERITIES[index],
+                'count': counts[index],
+                'sample': sample[:20] + '...' if len(sample) > 20 else sample
+            })
+            severity_levels.append(_PII_SEVERITIES[index])
+    else:
+        # Still walk the data for the field-name check
+        deque(text_values, maxlen=0)
 
     # Populate result
     result.detected_patterns = detected if detected else []
@@ -514,6 +933,11 @@ def scan_for_healthcare_pii(
     return result
 
 
+def _mask_match(match) -> str:
+    """Replacement for one union-regex match, e.g. [MASKED-SSN]."""
+    return _PII_MASKS[match.lastindex - 1]
+
+
 def mask_pii_in_text(text: str) -> str:
     """
     Mask detected PII patterns in text with placeholders.
@@ -532,24 +956,11 @@ def mask_pii_in_text(text: str) -> str:
     if not text:
         return text or ''
 
-    masked_text = text
-
-    for pattern_name, pattern_info in HEALTHCARE_PII_PATTERNS.items():
-        regex = pattern_info.get('pattern', '')
-        if not regex:
-            continue
-
-        try:
-            masked_text = re.sub(
-                regex,
-                f'[MASKED-{pattern_name.upper()}]',
-                masked_text,
-                flags=re.IGNORECASE
-            )
-        except re.error:
-            continue
+    if not _may_contain_pii(text):
+        return text
 
-    return masked_text
+    # One pass with the union regex - each match becomes its pattern's mask
+    return _union_re().sub(_mask_match, text, **_SCAN_KWARGS)
 
 
 # ============================================
@@ -694,4 +1105,4 @@ if __name__ == '__main__':
     sensitive_text = "Patient SSN: 123-45-6789, Phone: 555-123-4567, Email: test@example.com"
     masked = mask_pii_in_text(sensitive_text)
     print(f"Original: {sensitive_text}")
-    print(f"Masked: {masked}")
\ No newline at end of file
+    print(f"Masked: {masked}")
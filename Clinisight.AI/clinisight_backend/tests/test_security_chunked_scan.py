@@ -0,0 +1,60 @@
+"""
+Tests for the parallel chunked PII scan in shared/security.py
+==============================================================
+
+The chunked scan only runs with the optional `regex` engine
+(requirements-optional.txt) - without it these tests are skipped.
+
+Run from clinisight_backend/:
+    python -m unittest
+"""
+
+import importlib.util
+import random
+import unittest
+
+from shared import security
+
+HAS_REGEX = importlib.util.find_spec('regex') is not None
+
+
+def _spans(matches) -> list:
+    """(start, end, pattern group) of each match, for comparing two scans."""
+    return [(match.start(), match.end(), match.lastindex) for match in matches]
+
+
+@unittest.skipUnless(HAS_REGEX, "the chunked scan needs the regex engine")
+class ChunkedScanTest(unittest.TestCase):
+    """Chunked matches must be exactly what one finditer() pass finds."""
+
+    def assertSameAsSinglePass(self, text: str):
+        self.assertGreaterEqual(len(text), security._PARALLEL_SCAN_MIN)
+        single_pass = security._union_re().finditer(text, **security._SCAN_KWARGS)
+        self.assertEqual(_spans(security._iter_pii_matches(text)), _spans(single_pass))
+
+    def test_random_texts(self):
+        rnd = random.Random(42)
+        alphabet = '0123456789' * 4 + '-./@:() \nabcxyzMRNINSNPI'
+        for trial in range(50):
+            size = rnd.randint(security._PARALLEL_SCAN_MIN, 50 * 1024)
+            text = ''.join(rnd.choice(alphabet) for _ in range(size))
+            with self.subTest(trial=trial):
+                self.assertSameAsSinglePass(text)
+
+    def test_pii_on_chunk_boundaries(self):
+        samples = ['123-45-6789', 'john.doe@example.com', '4111 1111 1111 1111', 'NPI 1234567890']
+        for offset in range(-20, 5):
+            parts = []
+            for sample in samples * 8:
+                parts.append(' ' * (security._SCAN_CHUNK + offset - len(sample) // 2) + sample)
+            with self.subTest(offset=offset):
+                self.assertSameAsSinglePass(''.join(parts))
+
+    def test_long_candidate_runs(self):
+        for text in ('a.' * 10000 + '@example.com', '1' * 20000, '1-' * 10000):
+            with self.subTest(text=text[:6]):
+                self.assertSameAsSinglePass(text)
+
+
+if __name__ == '__main__':
+    unittest.main()
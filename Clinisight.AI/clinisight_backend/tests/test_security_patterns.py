@@ -0,0 +1,89 @@
+"""
+Tests for the healthcare PII patterns in shared/security.py
+============================================================
+
+Run from clinisight_backend/:
+    python -m unittest
+"""
+
+import time
+import unittest
+
+from shared.security import mask_pii_in_text, scan_for_healthcare_pii
+
+
+def _types(text: str) -> set:
+    """Pattern types found in a piece of text."""
+    result = scan_for_healthcare_pii(text=text, check_fields=False)
+    return {pattern['type'] for pattern in result.detected_patterns}
+
+
+class PathologicalInputTest(unittest.TestCase):
+    """Long runs must not send the scan into heavy backtracking."""
+
+    # Generous bound - a backtracking blow-up takes seconds, not milliseconds
+    MAX_SECONDS = 0.25
+
+    def test_long_runs_finish_quickly(self):
+        for text in (
+            '1' * 10000, '1 ' * 5000, '4111 ' * 2500, '1-1 ' * 2500,
+            # Long runs of email local-part characters, with and without an '@'
+            'a.' * 5000 + '@', '1.' * 5000,
+        ):
+            with self.subTest(text=text[:12]):
+                start = time.perf_counter()
+                scan_for_healthcare_pii(text=text)
+                mask_pii_in_text(text)
+                self.assertLess(time.perf_counter() - start, self.MAX_SECONDS)
+
+
+class NpiPatternTest(unittest.TestCase):
+
+    def test_prefixed_npi_is_detected(self):
+        for text in ('NPI 1234567890', 'NPI:1234567890', 'npi-1234567890', 'NPI1234567890'):
+            with self.subTest(text=text):
+                self.assertIn('npi', _types(text))
+
+    def test_bare_ten_digits_is_a_phone_number_not_an_npi(self):
+        types = _types('call 1234567890')
+        self.assertNotIn('npi', types)
+        self.assertIn('phone', types)
+
+
+class CreditCardPatternTest(unittest.TestCase):
+
+    def test_card_numbers_are_detected(self):
+        for text in (
+            '4111 1111 1111 1111',
+            '4111-1111-1111-1111',
+            '4111111111111111',
+            '4111 1111 1111 1',          # 13 digits
+            '4111 1111 1111 1111 1111',  # 20 digits
+        ):
+            with self.subTest(text=text):
+                self.assertIn('credit_card', _types(text))
+                self.assertEqual(mask_pii_in_text(text), '[MASKED-CREDIT_CARD]')
+
+    def test_twelve_digits_is_not_a_card(self):
+        self.assertNotIn('credit_card', _types('4111 1111 1111'))
+
+
+class EmailPatternTest(unittest.TestCase):
+
+    def test_email_is_masked_whole(self):
+        for address in ('john.doe@example.com', 'a+tag@mail.example.org', 'x' * 80 + '@example.com'):
+            with self.subTest(address=address[:20]):
+                self.assertIn('email', _types(f'contact {address} today'))
+                self.assertEqual(mask_pii_in_text(f'<{address}>'), '<[MASKED-EMAIL]>')
+
+
+class Icd10PatternTest(unittest.TestCase):
+
+    def test_diagnosis_codes_are_detected(self):
+        for code in ('E11.9', 'J45', 'U07.1'):
+            with self.subTest(code=code):
+                self.assertIn('icd10', _types(f'diagnosis {code} noted'))
+
+
+if __name__ == '__main__':
+    unittest.main()